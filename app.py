@@ -5,8 +5,18 @@ from openai import AzureOpenAI
 from azure.search.documents import SearchClient
 from azure.core.credentials import AzureKeyCredential
 import json
+import hashlib
 from datetime import datetime
 import requests # slack webhook용
+import profiler
+import memory_budget
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from local_index import init_local_search_client
+from corpus_snapshot import DEFAULT_SNAPSHOT_PATH
+from shard_routing import CATEGORY_SHARDS, ShardedSearchClient, sharding_enabled, shard_index_name, load_error_code_categories
+from search_resilience import CircuitBreaker, ResilientSearchClient, OPEN
+from dedup import diversify
+from system_graph import DEFAULT_GRAPH_PATH, load_graph
 
 # 환경 변수 로드
 load_dotenv()
@@ -32,6 +42,9 @@ def send_to_slack(result, webhook_url):
         return False, f"❌ Slack 전송 중 예외 발생: {str(e)}"
 # ===== 함수 끝 =====
 
+# 부분 재실행 영역 (Streamlit 1.37+ st.fragment, 이전 버전은 일반 함수로 실행)
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
 # 페이지 설정
 st.set_page_config(
     page_title="AIRA 이상징후 현황 조회 시스템",
@@ -53,8 +66,7 @@ def init_openai_client():
         return None
 
 # Azure Search 클라이언트 초기화 (호환성 개선)
-@st.cache_resource
-def init_search_client():
+def init_azure_search_client(breaker):
     try:
         # 캐시 무효화를 위한 고유 키 생성
         import time
@@ -72,33 +84,91 @@ def init_search_client():
         credential = AzureKeyCredential(api_key)
         
         # 단계별 초기화로 오류 방지
-        search_client = SearchClient(
-            endpoint=endpoint,
-            index_name=index_name,
-            credential=credential
-        )
+        if sharding_enabled():
+            # 카테고리별 샤드 인덱스 - 질문을 분류하여 관련 샤드만 조회
+            search_client = ShardedSearchClient(
+                {
+                    category: SearchClient(
+                        endpoint=endpoint,
+                        index_name=shard_index_name(index_name, category),
+                        credential=credential
+                    )
+                    for category in CATEGORY_SHARDS
+                },
+                load_error_code_categories(os.getenv("AZURE_SEARCH_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH))
+            )
+        else:
+            search_client = SearchClient(
+                endpoint=endpoint,
+                index_name=index_name,
+                credential=credential
+            )
         
         # 연결 테스트
         try:
             # 간단한 테스트 쿼리
             test_results = search_client.search("*", top=1)
             list(test_results)  # 결과를 실제로 가져와서 연결 확인
-            return search_client
         except Exception as test_error:
-            st.error(f"Azure Search 연결 테스트 실패: {str(test_error)}")
-            return None
+            # 클라이언트는 유지하고 브레이커를 열어 두어 쿨다운 후 재시도
+            st.warning(f"Azure Search 연결 테스트 실패: {str(test_error)}")
+            breaker.trip()
+        return search_client
             
     except Exception as e:
         st.error(f"Search 클라이언트 초기화 실패: {str(e)}")
         return None
 
-def get_system_status_summary(search_client):
-    """전체 시스템 상태 요약 조회"""
-    if not search_client:
-        return {}, set()
+# 검색 클라이언트 초기화 (Azure Search + 로컬 스냅샷 + 서킷 브레이커)
+@st.cache_resource
+def init_search_client():
+    breaker = CircuitBreaker(
+        slow_call_threshold=float(os.getenv("SEARCH_SLOW_CALL_SEC", "3.0")),
+        cooldown=float(os.getenv("SEARCH_BREAKER_COOLDOWN_SEC", "30"))
+    )
+    primary = init_azure_search_client(breaker)
+    fallback = init_local_search_client()
+    if fallback:
+        memory_budget.accountant.track("local_index", fallback)
+    
+    if not primary and not fallback:
+        return None
+    if not fallback:
+        st.warning("로컬 인덱스 스냅샷이 없어 Azure Search 장애 시 우회할 수 없습니다. update_data.py를 실행해주세요.")
+    
+    return ResilientSearchClient(
+        primary,
+        fallback,
+        breaker=breaker,
+        hedge_max=float(os.getenv("SEARCH_HEDGE_MAX_SEC", "2.0")),
+        timeout=float(os.getenv("SEARCH_TIMEOUT_SEC", "10"))
+    )
+
+# 연관 시스템 그래프 (update_data.py가 다시 생성하면 파일 수정 시각이 바뀌어 새로 로드)
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_system_graph(path, mtime):
+    system_graph = load_graph(path)
+    if system_graph:
+        memory_budget.accountant.track("system_graph", system_graph)
+    return system_graph
+
+def init_system_graph():
+    path = os.getenv("AIRA_SYSTEM_GRAPH_PATH", DEFAULT_GRAPH_PATH)
+    if not os.path.exists(path):
+        return None
+    return load_system_graph(path, os.path.getmtime(path))
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_system_status_summary(_search_client):
+    """전체 시스템 상태 요약 조회 (30초 캐시 - 재실행마다 전체 스캔하지 않도록)
+
+    (상태별 시스템, 전체 시스템, 조회 시각) 반환 - 조회 시각은 캐시된 값을 보여줄 때 실제 조회 시점 표시용
+    """
+    if not _search_client:
+        return {}, set(), None
         
     try:
-        results = search_client.search(
+        results = _search_client.search(
             search_text="*",
             top=50,
             select="system_status,related_systems"
@@ -106,6 +176,7 @@ def get_system_status_summary(search_client):
         
         system_status_count = {}
         all_systems = set()
+        fetched_at = datetime.now()
         
         for result in results:
             if result.get('system_status'):
@@ -119,28 +190,42 @@ def get_system_status_summary(search_client):
                 except:
                     continue
         
-        return system_status_count, all_systems
+        memory_budget.accountant.track("system_status_summary", (system_status_count, all_systems))
+        return system_status_count, all_systems, fetched_at
     except Exception as e:
         st.error(f"시스템 상태 조회 오류: {str(e)}")
-        return {}, set()
+        return {}, set(), None
+
+# 결과 다양화를 위해 화면에 보여줄 개수의 몇 배를 검색할지
+SEARCH_OVERFETCH = int(os.getenv("SEARCH_OVERFETCH", "3"))
 
-def search_errors(query, search_client):
-    """Azure Search를 사용하여 에러 검색"""
+def search_errors(query, search_client, top=3):
+    """Azure Search를 사용하여 에러 검색 (여유 있게 받아서 같은 에러 코드가 슬롯을 독점하지 않도록 다양화)"""
     if not search_client:
         return []
         
     try:
         results = search_client.search(
             search_text=query,
-            top=3,
+            top=top * SEARCH_OVERFETCH,
             include_total_count=True
         )
-        return list(results)
+        return diversify(list(results), top)
     except Exception as e:
         st.error(f"검색 중 오류 발생: {str(e)}")
         return []
 
-def generate_response(query, search_results, openai_client):
+def graph_context_systems(query, search_results, system_graph, limit=3):
+    """그래프 컨텍스트 대상 시스템 - 질문에 언급된 시스템 우선, 부족하면 검색 결과의 관련 시스템"""
+    systems = system_graph.find_systems(query)
+    for result in search_results:
+        for system in (result.get('related_systems') or "").split(","):
+            system = system.strip()
+            if system in system_graph and system not in systems:
+                systems.append(system)
+    return systems[:limit]
+
+def generate_response(query, search_results, openai_client, system_graph=None):
     """OpenAI를 사용하여 응답 생성"""
     
     if not openai_client:
@@ -160,6 +245,10 @@ def generate_response(query, search_results, openai_client):
                 except:
                     pass
             
+            occurrence_str = ""
+            if (result.get('occurrence_count') or 1) > 1:
+                occurrence_str = f"\n발생 이력: {result['occurrence_count']}회 ({result.get('first_occurred_at', 'N/A')} ~ {result.get('last_occurred_at', 'N/A')})"
+            
             context += f"""
 에러 코드: {result.get('error_code', 'N/A')}
 에러명: {result.get('error_name', 'N/A')} 
@@ -168,10 +257,16 @@ def generate_response(query, search_results, openai_client):
 해결 방법: {result.get('solution', 'N/A')}
 카테고리: {result.get('category', 'N/A')}
 심각도: {result.get('severity', 'N/A')}
-관련 시스템: {result.get('related_systems', 'N/A')}{system_status_str}
+관련 시스템: {result.get('related_systems', 'N/A')}{system_status_str}{occurrence_str}
 ---
 """
 
+    # 연관 시스템 그래프 컨텍스트 (영향 범위)
+    if system_graph:
+        graph_context = system_graph.describe(graph_context_systems(query, search_results, system_graph))
+        if graph_context:
+            context += f"\n\n연관 시스템 영향 범위 (과거 장애 이력 기준):\n{graph_context}\n"
+
     system_prompt = f"""당신은 AIRA 이상징후 현황 조회 시스템의 AI 어시스턴트입니다.
 MSA 환경에서 핸드폰 개통(신규개통, 번호이동, 기기변경) 시 발생하는 에러들에 대해 전문적으로 답변합니다.
 
@@ -187,69 +282,271 @@ MSA 환경에서 핸드폰 개통(신규개통, 번호이동, 기기변경) 시
 """
 
     try:
-        response = openai_client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
+        with profiler.stage("openai"):
+            response = openai_client.chat.completions.create(
+                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query}
+                ],
+                max_tokens=1000,
+                temperature=0.7
+            )
         return response.choices[0].message.content
     except Exception as e:
         return f"응답 생성 중 오류가 발생했습니다: {str(e)}"
 
-def render_system_status_sidebar(search_client):
-    """사이드바에 시스템 상태 표시"""
-    with st.sidebar:
-        st.header("🖥️ 시스템 상태")
+def result_content_hash(result):
+    """검색 결과 내용 해시 (검색 점수 등 @ 메타 필드 제외)"""
+    content = {k: v for k, v in result.items() if not k.startswith("@")}
+    return hashlib.sha1(json.dumps(content, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+# 결과 카드 캐시 (문서 ID + 내용 해시 기준, 메모리 사용량 집계 및 전체 예산 초과 시 LRU 제거)
+@st.cache_resource
+def init_result_card_cache():
+    return memory_budget.accountant.register(memory_budget.LRUCache("result_cards", max_entries=1000))
+
+def build_result_card(result):
+    """결과 카드 마크다운 생성"""
+    left = [
+        f"**카테고리:** {result.get('category', 'N/A')}",
+        f"**심각도:** {result.get('severity', 'N/A')}",
+        f"**증상:** {result.get('symptoms', 'N/A')}",
+    ]
+    if (result.get('occurrence_count') or 1) > 1:
+        left.append(f"**발생 이력:** {result['occurrence_count']}회 ({result.get('first_occurred_at', 'N/A')} ~ {result.get('last_occurred_at', 'N/A')})")
+    right = [f"**관련 시스템:** {result.get('related_systems', 'N/A')}"]
+    
+    # 시스템 상태 표시
+    if result.get('system_status'):
+        try:
+            system_status = json.loads(result['system_status'])
+            right.append("**시스템 상태:**")
+            for system, status in system_status.items():
+                status_icon = "🟢" if status == "정상" else "🟡" if "지연" in status else "🟠" if "오류" in status or "부하" in status else "🔴"
+                right.append(f"  {status_icon} {system}: {status}")
+        except:
+            pass
+    
+    bottom = [f"**해결방법:** {result.get('solution', 'N/A')}"]
+    if result.get('prevention'):
+        bottom.append(f"**예방조치:** {result.get('prevention', 'N/A')}")
+    
+    return {
+        "title": f"📸 {result.get('error_code', 'N/A')} - {result.get('error_name', 'N/A')}",
+        "left": "\n\n".join(left),
+        "right": "\n\n".join(right),
+        "bottom": "\n\n".join(bottom),
+    }
+
+def result_card_key(result):
+    return (result.get('id') or result.get('error_code'), result_content_hash(result))
+
+def build_result_cards(search_results):
+    cache = init_result_card_cache()
+    cards = []
+    for result in search_results:
+        key = result_card_key(result)
+        card = cache.get(key)
+        if card is None:
+            card = cache.put(key, build_result_card(result))
+        cards.append(card)
+    return cards
+
+def load_result_cards(card_keys, search_client):
+    """채팅 기록에 저장한 카드 키로 카드 조회 - 캐시에서 제거되었으면 문서를 다시 조회하여 재생성 (실패하면 생략)"""
+    cache = init_result_card_cache()
+    cards = []
+    for key in card_keys:
+        card = cache.get(key)
+        if card is None and search_client:
+            try:
+                card = cache.put(key, build_result_card(search_client.get_document(key[0])))
+            except Exception:
+                continue
+        if card is not None:
+            cards.append(card)
+    return cards
+
+def render_result_cards(cards):
+    """관련 에러 정보 카드 표시 (미리 만들어 둔 마크다운 사용)"""
+    st.markdown("---")
+    st.markdown("### 📋 관련 에러 정보")
+    for card in cards:
+        with st.expander(card["title"]):
+            col1, col2 = st.columns([1, 1])
+            with col1:
+                st.markdown(card["left"])
+            with col2:
+                st.markdown(card["right"])
+            st.markdown(card["bottom"])
+
+@fragment
+def render_system_status_sidebar(search_client, system_graph=None):
+    """사이드바에 시스템 상태 표시 (사이드바 안의 조작은 이 영역만 재실행)"""
+    st.header("🖥️ 시스템 상태")
+    
+    # 상태 갱신 버튼 - 상태 요약 캐시만 비우고 사이드바만 다시 그림
+    if st.button("🔄 상태 갱신", key="refresh_status"):
+        get_system_status_summary.clear()
+    
+    if not search_client:
+        st.error("Search 클라이언트가 초기화되지 않았습니다.")
+        return
+
+    # 검색 경로 상태 (Azure Search 장애 시 로컬 스냅샷 사용)
+    if search_client.primary is None:
+        st.warning("⚠️ Azure Search 미연결 - 로컬 스냅샷으로 응답 중")
+    elif search_client.breaker.state == OPEN:
+        st.warning("⚠️ Azure Search 응답 지연/오류 - 로컬 스냅샷으로 응답 중")
+
+    # 시스템 상태 조회
+    system_status_count, all_systems, fetched_at = get_system_status_summary(search_client)
+    
+    if system_status_count:
+        # 전체 상태 요약
+        total_systems = len(all_systems)
+        normal_systems = len(system_status_count.get('정상', set()))
         
-        # # 상태 갱신 버튼
-        # if st.button("🔄 상태 갱신", key="refresh_status"):
-        #     st.cache_resource.clear()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("전체 시스템", total_systems)
+        with col2:
+            st.metric("정상 시스템", normal_systems)
         
-        if not search_client:
-            st.error("Search 클라이언트가 초기화되지 않았습니다.")
-            return
+        # 상태별 세부 정보
+        st.markdown("### 📊 상태별 현황")
         
-        # 시스템 상태 조회
-        system_status_count, all_systems = get_system_status_summary(search_client)
+        status_colors = {
+            '정상': '🟢',
+            '지연': '🟡', 
+            '일부지연': '🟡',
+            '일시적오류': '🟠',
+            '높은부하': '🟠',
+            '점검중': '🔴'
+        }
         
-        if system_status_count:
-            # 전체 상태 요약
-            total_systems = len(all_systems)
-            normal_systems = len(system_status_count.get('정상', set()))
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("전체 시스템", total_systems)
-            with col2:
-                st.metric("정상 시스템", normal_systems)
-            
-            # 상태별 세부 정보
-            st.markdown("### 📊 상태별 현황")
-            
-            status_colors = {
-                '정상': '🟢',
-                '지연': '🟡', 
-                '일부지연': '🟡',
-                '일시적오류': '🟠',
-                '높은부하': '🟠',
-                '점검중': '🔴'
-            }
-            
-            for status, systems in system_status_count.items():
-                if systems:
-                    color = status_colors.get(status, '⚪')
-                    with st.expander(f"{color} {status} ({len(systems)}개)"):
-                        for system in sorted(systems):
-                            st.write(f"• {system}")
-            
-            # 마지막 업데이트 시간
-            st.caption(f"⏰ 마지막 업데이트: {datetime.now().strftime('%H:%M:%S')}")
-        else:
-            st.warning("시스템 상태 정보를 불러올 수 없습니다.")
+        for status, systems in system_status_count.items():
+            if systems:
+                color = status_colors.get(status, '⚪')
+                with st.expander(f"{color} {status} ({len(systems)}개)"):
+                    for system in sorted(systems):
+                        st.write(f"• {system}")
+        
+        # 마지막 업데이트 시간 (화면을 그린 시각이 아니라 상태 요약을 실제로 조회한 시각, 최대 30초 캐시)
+        st.caption(f"⏰ 마지막 업데이트: {fetched_at.strftime('%H:%M:%S')}")
+    else:
+        st.warning("시스템 상태 정보를 불러올 수 없습니다.")
+    
+    if system_graph:
+        render_blast_radius(system_graph, system_status_count)
+
+def render_blast_radius(system_graph, system_status_count):
+    """선택한 시스템의 영향 범위 (함께 이상이 났던 시스템, 관련 에러 코드)"""
+    st.markdown("### 🕸️ 영향 범위")
+    
+    # 현재 이상 상태인 시스템을 먼저 표시
+    abnormal = sorted({
+        system for status, systems in system_status_count.items() if status != '정상'
+        for system in systems if system in system_graph
+    })
+    options = abnormal + [system for system in system_graph.systems if system not in abnormal]
+    system = st.selectbox("시스템 선택", options, key="blast_radius_system")
+    radius = system_graph.blast_radius(system)
+    if not radius:
+        return
+    
+    st.caption(f"최근 상태: {radius['status']} · 최근 발생: {radius['last_seen'] or 'N/A'}")
+    if radius["neighbors"]:
+        st.markdown("**함께 영향받은 시스템**")
+        for neighbor in radius["neighbors"]:
+            st.write(f"• {neighbor['system']} - 동시 이상 {neighbor['degraded']}회 / 동시 발생 {neighbor['weight']}회")
+    if radius["incidents"]:
+        st.markdown("**관련 에러 코드**")
+        for incident in radius["incidents"]:
+            st.write(f"• {incident['error_code']} ({incident['count']}회, 최근 {incident['last_seen'] or 'N/A'})")
+
+def render_chat_history(search_client=None):
+    """채팅 기록 표시 (턴별로 저장한 결과 카드 포함 - 위젯이 없어 fragment로 나누지 않음)"""
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            if message.get("card_keys"):
+                cards = load_result_cards(message["card_keys"], search_client)
+                if cards:
+                    render_result_cards(cards)
+
+@fragment
+def render_button_bar():
+    """하단 버튼 (버튼 클릭은 이 영역만 재실행)"""
+    slack_webhook_url = os.getenv("SLACK_WEBHOOK_URL", "")
+    btn1, btn2, btn3, _ = st.columns([2, 2, 2, 0.5])
+
+    with btn1:
+        if st.button("🆂 Slack으로 결과 전송", key="send_to_slack_btn_main"):
+            assistant_messages = [m for m in st.session_state.messages if m["role"] == "assistant"]
+            if not slack_webhook_url:
+                st.error("SLACK_WEBHOOK_URL이 설정되지 않았습니다.")
+            elif not assistant_messages:
+                st.error("전송할 assistant 응답이 없습니다.")
+            else:
+                latest_response = assistant_messages[-1]["content"]
+                ok, msg = send_to_slack(latest_response, slack_webhook_url)
+                if ok:
+                    st.success(msg)
+                else:
+                    st.error(msg)
+                    st.code(latest_response, language="markdown")
+                    st.code(slack_webhook_url, language="text")
+
+    with btn2:
+        if st.button("💬 채팅 초기화", key="reset_chat_btn"):
+            st.session_state.messages = []
+            st.rerun()
+
+    with btn3:
+        if st.button("ℹ️ 도움말", key="help_btn"):
+            st.info("**사용법:**\n1. 에러 코드나 증상을 입력하세요\n2. AI가 관련 정보를 검색하여 해결책을 제공합니다\n3. 사이드바에서 실시간 시스템 상태를 확인하세요")
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+@fragment
+def render_memory_admin():
+    """메모리 사용량 관리자 화면 (?memory=<MEMORY_ADMIN_TOKEN>)"""
+    st.markdown("---")
+    st.header("🧠 메모리 사용량")
+    st.button("🔄 새로고침", key="refresh_memory")
+    
+    snapshot = memory_budget.accountant.snapshot()
+    mb = memory_budget.MB
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("캐시 + 세션", f"{snapshot['evictable_bytes'] / mb:.1f}MB",
+                  help=f"전체 예산 {snapshot['budget_bytes'] / mb:.0f}MB (상주 객체 제외, 0이면 제한 없음)")
+    with col2:
+        st.metric("세션 수", len(snapshot["sessions"]),
+                  help=f"세션 예산 {snapshot['session_budget_bytes'] / mb:.1f}MB")
+    caption = f"상주 객체 포함 집계 합계: {snapshot['total_bytes'] / mb:.1f}MB"
+    if snapshot["rss_bytes"] is not None:
+        caption += f" · 프로세스 RSS: {snapshot['rss_bytes'] / mb:.1f}MB"
+    st.caption(caption)
+    
+    st.table([
+        {"저장소": store["name"], "종류": store["kind"], "항목": store["entries"],
+         "KB": round(store["bytes"] / 1024, 1), "제거": store["evictions"]}
+        for store in snapshot["stores"]
+    ])
+    if snapshot["sessions"]:
+        with st.expander("세션별 사용량 (상위 10개)"):
+            st.table([
+                {"세션": session["session_id"][:8], "메시지": session["messages"],
+                 "KB": round(session["bytes"] / 1024, 1), "제거": session["evictions"]}
+                for session in snapshot["sessions"][:10]
+            ])
+    st.download_button("📥 지표 내보내기 (Prometheus)", memory_budget.accountant.prometheus(),
+                       file_name="aira_memory.prom", mime="text/plain", key="export_memory")
 
 def main():
     # 헤더
@@ -260,8 +557,10 @@ def main():
     # st.write("🔄 시스템 초기화 중...")
     
     try:
-        openai_client = init_openai_client()
-        search_client = init_search_client()
+        with profiler.stage("init"):
+            openai_client = init_openai_client()
+            search_client = init_search_client()
+            system_graph = init_system_graph()
         
         if not openai_client or not search_client:
             st.error("시스템 초기화에 실패했습니다. 환경변수를 확인해주세요.")
@@ -284,7 +583,10 @@ def main():
         st.stop()
     
     # 사이드바 - 시스템 상태
-    render_system_status_sidebar(search_client)
+    with profiler.stage("sidebar"), st.sidebar:
+        render_system_status_sidebar(search_client, system_graph)
+        if memory_budget.is_admin(st.query_params):
+            render_memory_admin()
     
     # 사이드바 - 기본 정보
     # with st.sidebar:
@@ -307,14 +609,19 @@ def main():
             "role": "assistant", 
             "content": "안녕하세요! AIRA 시스템입니다. \n\nMSA 환경에서 핸드폰 개통 시 발생하는 문제점이나 에러에 대해 질문해주세요.\n\n**예시 질문:**\n- '신규개통 시 본인인증이 안 돼요'\n- 'MSA-001 에러가 발생했어요'\n- '번호이동 중에 오류가 생겼어요'\n- '시스템 상태는 어떤가요?'"
         })
+    
+    # 세션 채팅 기록 메모리 집계 (세션 상태에 보관 → 세션 종료 시 집계에서도 빠짐)
+    session_id = current_session_id()
+    st.session_state["memory_ledger"] = memory_budget.accountant.session(session_id, st.session_state.messages)
 
     # 채팅 메시지 표시
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    with profiler.stage("history"):
+        render_chat_history(search_client)
 
     # 사용자 입력
     if prompt := st.chat_input("에러나 문제 상황을 입력해주세요"):
+        profiler.tag("chat")
+        
         # 사용자 메시지 추가
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
@@ -323,74 +630,33 @@ def main():
         # 검색 및 응답 생성
         with st.chat_message("assistant"):
             with st.spinner("분석 중..."):
-                search_results = search_errors(prompt, search_client)
-                response = generate_response(prompt, search_results, openai_client)
-                st.markdown(response)
+                with profiler.stage("search"):
+                    search_results = search_errors(prompt, search_client)
+                with profiler.stage("generate"):
+                    response = generate_response(prompt, search_results, openai_client, system_graph)
                 
-                # 관련 에러 정보 표시
-                if search_results:
-                    st.markdown("---")
-                    st.markdown("### 📋 관련 에러 정보")
-                    for i, result in enumerate(search_results, 1):
-                        with st.expander(f"📸 {result.get('error_code', 'N/A')} - {result.get('error_name', 'N/A')}"):
-                            col1, col2 = st.columns([1, 1])
-                            
-                            with col1:
-                                st.markdown(f"**카테고리:** {result.get('category', 'N/A')}")
-                                st.markdown(f"**심각도:** {result.get('severity', 'N/A')}")
-                                st.markdown(f"**증상:** {result.get('symptoms', 'N/A')}")
-                            
-                            with col2:
-                                st.markdown(f"**관련 시스템:** {result.get('related_systems', 'N/A')}")
-                                
-                                # 시스템 상태 표시
-                                if result.get('system_status'):
-                                    try:
-                                        system_status = json.loads(result['system_status'])
-                                        st.markdown("**시스템 상태:**")
-                                        for system, status in system_status.items():
-                                            status_icon = "🟢" if status == "정상" else "🟡" if "지연" in status else "🟠" if "오류" in status or "부하" in status else "🔴"
-                                            st.markdown(f"  {status_icon} {system}: {status}")
-                                    except:
-                                        pass
-                            
-                            st.markdown(f"**해결방법:** {result.get('solution', 'N/A')}")
-                            
-                            if result.get('prevention'):
-                                st.markdown(f"**예방조치:** {result.get('prevention', 'N/A')}")
+                with profiler.stage("render"):
+                    st.markdown(response)
+                    
+                    # 관련 에러 정보 표시
+                    cards = build_result_cards(search_results)
+                    if cards:
+                        render_result_cards(cards)
+        
+        # 어시스턴트 응답 저장 (카드 자체는 결과 카드 캐시에만 두고 기록에는 키만 저장 - 메모리 이중 집계 방지)
+        st.session_state.messages.append({
+            "role": "assistant", "content": response,
+            "card_keys": [result_card_key(result) for result in search_results],
+        })
         
-        # 어시스턴트 응답 저장
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        # 세션 / 전체 메모리 예산 적용 (초과 시 오래된 대화와 캐시부터 제거)
+        memory_budget.accountant.account_session(session_id, st.session_state.messages, st.session_state["memory_ledger"])
 
     # 하단 버튼
-    slack_webhook_url = os.getenv("SLACK_WEBHOOK_URL", "")
-    btn1, btn2, btn3, _ = st.columns([2, 2, 2, 0.5])
-
-    with btn1:
-        if st.button("🆂 Slack으로 결과 전송", key="send_to_slack_btn_main"):
-            assistant_messages = [m for m in st.session_state.messages if m["role"] == "assistant"]
-            if not slack_webhook_url:
-                st.error("SLACK_WEBHOOK_URL이 설정되지 않았습니다.")
-            elif not assistant_messages:
-                st.error("전송할 assistant 응답이 없습니다.")
-            else:
-                latest_response = assistant_messages[-1]["content"]
-                ok, msg = send_to_slack(latest_response, slack_webhook_url)
-                if ok:
-                    st.success(msg)
-                else:
-                    st.error(msg)
-                    st.code(latest_response, language="markdown")
-                    st.code(slack_webhook_url, language="text")
-
-    with btn2:
-        if st.button("💬 채팅 초기화", key="reset_chat_btn"):
-            st.session_state.messages = []
-            st.rerun()
-
-    with btn3:
-        if st.button("ℹ️ 도움말", key="help_btn"):
-            st.info("**사용법:**\n1. 에러 코드나 증상을 입력하세요\n2. AI가 관련 정보를 검색하여 해결책을 제공합니다\n3. 사이드바에서 실시간 시스템 상태를 확인하세요")
+    with profiler.stage("buttons"):
+        render_button_bar()
 
 if __name__ == "__main__":
-    main()
+    # PROFILE_SAMPLE_RATE 비율 또는 ?profile=<PROFILE_ADMIN_TOKEN> 요청만 샘플링 프로파일링
+    with profiler.profile_run(profiler.should_profile(st.query_params)):
+        main()
@@ -0,0 +1,394 @@
+"""
+에러 데이터 바이너리 스냅샷 컴파일러
+
+data/error_data.json을 스키마 검증 후 슬롯 기반 바이너리 스냅샷으로 변환합니다.
+스냅샷은 메모리 매핑으로 열리며 문자열은 필요할 때만 디코딩합니다.
+
+파일 구조 (리틀엔디언):
+    header  : magic, version, 레코드 수, 필드 수, 문자열 수, 섹션 오프셋, 원본 식별 문자열 ID
+    strings : 중복 제거된 UTF-8 문자열 테이블 (0 ~ 필드 수-1번은 필드명)
+    slots   : 레코드당 필드 수만큼의 uint32 문자열 ID (없는 값은 NULL_ID)
+    tables  : 조회 테이블 (키 문자열 ID → 레코드 ID 목록)
+
+사용법:
+    python corpus_snapshot.py [입력 JSON/JSONL] [출력 스냅샷]
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+from datetime import datetime
+
+MAGIC = b"AIRASNP\0"
+SNAPSHOT_VERSION = 2
+DEFAULT_SNAPSHOT_PATH = "./data/error_data.snap"
+
+HEADER = struct.Struct("<8sHHIII4QI")
+TABLE_HEADER = struct.Struct("<III")
+NULL_ID = 0xFFFFFFFF
+
+# 레코드 슬롯 순서 (스냅샷 버전이 바뀌지 않는 한 변경 금지)
+FIELDS = [
+    "id", "error_code", "error_name", "description", "symptoms", "solution",
+    "category", "severity", "related_systems", "occurred_at", "system_status",
+    "system_resources", "monitoring_points", "prevention",
+]
+# JSON 문자열로 직렬화하여 저장하는 필드
+JSON_FIELDS = {"system_status", "system_resources"}
+
+# ===== 스키마 =====
+REQUIRED_FIELDS = [
+    "error_code", "error_name", "description", "symptoms", "solution",
+    "category", "severity", "related_systems", "occurred_at", "system_status",
+]
+CATEGORIES = {"신규개통", "번호이동", "기기변경"}
+SEVERITIES = {"높음", "중간", "낮음"}
+SYSTEM_STATUSES = {"정상", "지연", "일부지연", "일시적오류", "높은부하", "점검중"}
+
+
+def split_values(value):
+    """콤마로 구분된 문자열 필드를 목록으로 변환 (category, related_systems)"""
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+
+def validate_record(record):
+    """레코드 스키마 검증 - 오류 메시지 목록 반환 (비어 있으면 정상)"""
+    if not isinstance(record, dict):
+        return ["레코드가 객체 형식이 아님"]
+
+    errors = []
+    for field in REQUIRED_FIELDS:
+        if record.get(field) in (None, "", {}):
+            errors.append(f"필수 필드 누락: {field}")
+    unknown = set(record) - set(FIELDS)
+    if unknown:
+        errors.append(f"알 수 없는 필드: {', '.join(sorted(unknown))}")
+
+    if record.get("category"):
+        invalid = [c for c in split_values(record["category"]) if c not in CATEGORIES]
+        if invalid:
+            errors.append(f"잘못된 category: {', '.join(invalid)}")
+
+    severity = record.get("severity")
+    if severity and (not isinstance(severity, str) or severity not in SEVERITIES):
+        errors.append(f"잘못된 severity: {record['severity']}")
+
+    occurred_at = record.get("occurred_at")
+    if occurred_at:
+        try:
+            if not isinstance(occurred_at, str) or "T" not in occurred_at:
+                raise ValueError
+            datetime.fromisoformat(occurred_at.replace("Z", "+00:00"))
+        except ValueError:
+            errors.append(f"잘못된 occurred_at (ISO 8601 아님): {occurred_at}")
+
+    system_status = record.get("system_status")
+    if system_status:
+        if isinstance(system_status, str):
+            try:
+                system_status = json.loads(system_status)
+            except ValueError:
+                system_status = None
+        if not isinstance(system_status, dict):
+            errors.append("system_status가 {시스템: 상태} 형식이 아님")
+        else:
+            invalid = sorted({str(s) for s in system_status.values() if not isinstance(s, str) or s not in SYSTEM_STATUSES})
+            if invalid:
+                errors.append(f"잘못된 system_status 값: {', '.join(invalid)}")
+
+    if record.get("system_resources") is not None and not isinstance(record["system_resources"], (dict, str)):
+        errors.append("system_resources가 객체 형식이 아님")
+    return errors
+
+
+def validate_records(records):
+    """전체 레코드 검증 - (정상 레코드 목록, [(인덱스, 오류 목록)]) 반환"""
+    valid, invalid = [], []
+    for i, record in enumerate(records):
+        errors = validate_record(record)
+        if errors:
+            invalid.append((i, errors))
+        else:
+            valid.append(record)
+    return valid, invalid
+
+
+def load_records(path):
+    """JSON 배열(.json) 또는 한 줄에 한 레코드(.jsonl) 파일 로드"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+# ===== 컴파일 =====
+def source_fingerprint(path):
+    """원본 데이터 파일 식별 문자열 (절대 경로, 크기, 수정 시각) - 스냅샷 재사용 여부 판단에 사용"""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def _u32_bytes(values):
+    arr = array("I", values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _slot_value(record, field, index):
+    value = record.get(field)
+    if field == "id" and value is None:
+        return str(index + 1)
+    if value is None:
+        return None
+    if field in JSON_FIELDS and not isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return str(value)
+
+
+def _build_tables(records):
+    """조회 테이블 생성 - {테이블명: {키: [레코드 ID]}}"""
+    tables = {"error_code": {}, "category": {}, "severity": {}, "system": {}, "status": {}}
+
+    def add(table, key, record_id):
+        ids = tables[table].setdefault(key, [])
+        if not ids or ids[-1] != record_id:
+            ids.append(record_id)
+
+    for record_id, record in enumerate(records):
+        add("error_code", record["error_code"], record_id)
+        add("severity", record["severity"], record_id)
+        for category in split_values(record["category"]):
+            add("category", category, record_id)
+
+        system_status = record["system_status"]
+        if isinstance(system_status, str):
+            system_status = json.loads(system_status)
+        systems = set(split_values(record["related_systems"])) | set(system_status)
+        for system in sorted(systems):
+            add("system", system, record_id)
+        for status in sorted(set(system_status.values())):
+            add("status", status, record_id)
+    return tables
+
+
+def compile_snapshot(records, path=DEFAULT_SNAPSHOT_PATH, source=None):
+    """검증된 레코드 목록을 바이너리 스냅샷으로 저장 - 저장된 레코드 수 반환
+
+    source: 원본 식별 문자열 (source_fingerprint) - 같은 원본에서 만든 스냅샷인지 확인할 때 사용
+    """
+    string_ids = {}
+    strings = []
+
+    def intern(value):
+        if value is None:
+            return NULL_ID
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    for field in FIELDS:
+        intern(field)
+
+    slots = array("I")
+    for i, record in enumerate(records):
+        slots.extend(intern(_slot_value(record, field, i)) for field in FIELDS)
+
+    table_chunks = [struct.pack("<I", 0)]
+    tables = _build_tables(records)
+    for name, entries in tables.items():
+        keys, postings = [], []
+        for key in sorted(entries):
+            ids = entries[key]
+            keys.extend((intern(key), len(postings), len(ids)))
+            postings.extend(ids)
+        table_chunks.append(TABLE_HEADER.pack(intern(name), len(entries), len(postings)))
+        table_chunks.append(_u32_bytes(keys))
+        table_chunks.append(_u32_bytes(postings))
+    table_chunks[0] = struct.pack("<I", len(tables))
+    source_sid = intern(source)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    offsets_bytes = _u32_bytes(offsets)
+    blob = b"".join(encoded)
+    blob += b"\0" * (-len(blob) % 4)  # 이후 섹션 4바이트 정렬
+    slots_bytes = _u32_bytes(slots)
+
+    off_offsets = HEADER.size
+    off_blob = off_offsets + len(offsets_bytes)
+    off_slots = off_blob + len(blob)
+    off_tables = off_slots + len(slots_bytes)
+    header = HEADER.pack(MAGIC, SNAPSHOT_VERSION, 0, len(records), len(FIELDS), len(strings),
+                         off_offsets, off_blob, off_slots, off_tables, source_sid)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in (header, offsets_bytes, blob, slots_bytes, *table_chunks):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+# ===== 로드 =====
+class SnapshotError(ValueError):
+    """스냅샷 파일 형식/버전 오류"""
+
+
+class CorpusSnapshot:
+    """메모리 매핑된 바이너리 스냅샷 리더"""
+
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise SnapshotError(f"빈 스냅샷 파일: {path}") from e
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self):
+        mm = self._mm
+        if len(mm) < HEADER.size:
+            raise SnapshotError(f"스냅샷 헤더 손상: {self.path}")
+        (magic, version, _, n_records, n_fields, n_strings,
+         off_offsets, off_blob, off_slots, off_tables, source_sid) = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"스냅샷 파일 형식이 아님: {self.path}")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"지원하지 않는 스냅샷 버전: {version} (필요: {SNAPSHOT_VERSION})")
+
+        self._n_records = n_records
+        self._n_fields = n_fields
+        self._blob_start = off_blob
+        self._views = []
+        self._offsets = self._u32_section(off_offsets, off_blob)
+        self._slots = self._u32_section(off_slots, off_tables)
+        self.field_names = [self.string(i) for i in range(n_fields)]
+        if len(self._offsets) != n_strings + 1 or len(self._slots) != n_records * n_fields:
+            raise SnapshotError(f"스냅샷 섹션 크기 불일치: {self.path}")
+        self.source = self.string(source_sid)
+
+        self._tables = {}
+        pos = off_tables
+        (n_tables,) = struct.unpack_from("<I", mm, pos)
+        pos += 4
+        for _ in range(n_tables):
+            name_sid, n_keys, n_postings = TABLE_HEADER.unpack_from(mm, pos)
+            pos += TABLE_HEADER.size
+            keys = self._u32_section(pos, pos + n_keys * 12)
+            pos += n_keys * 12
+            postings = self._u32_section(pos, pos + n_postings * 4)
+            pos += n_postings * 4
+            index = {self.string(keys[k]): (keys[k + 1], keys[k + 2]) for k in range(0, len(keys), 3)}
+            self._tables[self.string(name_sid)] = (index, postings)
+
+    def _u32_section(self, start, end):
+        """mmap 구간을 복사 없이 uint32 배열로 참조"""
+        view = memoryview(self._mm)[start:end]
+        self._views.append(view)
+        if sys.byteorder != "little":
+            arr = array("I", view.tobytes())
+            arr.byteswap()
+            return arr
+        u32 = view.cast("I")
+        self._views.append(u32)
+        return u32
+
+    def __len__(self):
+        return self._n_records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._tables = {}
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def string(self, sid):
+        if sid == NULL_ID:
+            return None
+        start = self._blob_start + self._offsets[sid]
+        end = self._blob_start + self._offsets[sid + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def raw(self, record_id):
+        """레코드의 원본 슬롯 값 (JSON 필드는 문자열 그대로)"""
+        base = record_id * self._n_fields
+        values = {}
+        for i, field in enumerate(self.field_names):
+            value = self.string(self._slots[base + i])
+            if value is not None:
+                values[field] = value
+        return values
+
+    def record(self, record_id):
+        """error_data.json과 같은 형태의 레코드"""
+        values = self.raw(record_id)
+        for field in JSON_FIELDS:
+            if field in values:
+                values[field] = json.loads(values[field])
+        return values
+
+    def document(self, record_id):
+        """Azure Search 인덱스에 업로드하는 형태의 문서 (system_resources 제외)"""
+        values = self.raw(record_id)
+        values.pop("system_resources", None)
+        return values
+
+    def records(self):
+        for record_id in range(self._n_records):
+            yield self.record(record_id)
+
+    def documents(self):
+        return [self.document(record_id) for record_id in range(self._n_records)]
+
+    def keys(self, table):
+        return list(self._tables[table][0])
+
+    def lookup(self, table, key):
+        """조회 테이블에서 키에 해당하는 레코드 ID 목록"""
+        index, postings = self._tables[table]
+        if key not in index:
+            return []
+        start, count = index[key]
+        return list(postings[start:start + count])
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "./data/error_data.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SNAPSHOT_PATH
+
+    records = load_records(source)
+    valid, invalid = validate_records(records)
+    for i, errors in invalid:
+        print(f"⚠️ 항목 {i} 스키마 오류: {'; '.join(errors)}")
+
+    count = compile_snapshot(valid, target, source=source_fingerprint(source))
+    print(f"✅ 스냅샷 컴파일 완료: {target} ({count}/{len(records)}건, {os.path.getsize(target):,} bytes)")
+    return not invalid
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,125 @@
+"""
+준중복 에러 레코드 클러스터링 (MinHash + LSH)
+
+같은 error_code에 증상/해결 방법이 거의 같은 반복 장애 레코드를 하나의 대표 문서로 묶습니다.
+대표 문서에는 발생 횟수(occurrence_count)와 최초/최근 발생 시각이 추가됩니다.
+
+- MinHash: 단어 2-gram 집합을 한 번만 해시하는 one-permutation 방식 (레코드당 O(단어 수))
+- LSH: 서명을 band로 나누어 (error_code, band) 버킷이 같은 레코드만 비교 → 전체가 거의 선형
+"""
+
+import os
+import re
+import zlib
+
+NUM_HASHES = 64
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+SIMILARITY_THRESHOLD = 0.8
+
+# 유사도 비교에 사용하는 텍스트 필드
+TEXT_FIELDS = ["error_name", "description", "symptoms", "solution"]
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]+")
+_EMPTY = 0xFFFFFFFF
+
+
+def dedup_enabled():
+    """INGEST_DEDUP=false 로 끌 수 있음 (기본 사용)"""
+    return os.getenv("INGEST_DEDUP", "true").strip().lower() not in ("0", "false", "no")
+
+
+def shingles(record):
+    """텍스트 필드의 단어 2-gram 집합"""
+    words = []
+    for field in TEXT_FIELDS:
+        words.extend(_WORD_PATTERN.findall(str(record.get(field) or "").lower()))
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def minhash(tokens, num_hashes=NUM_HASHES):
+    """one-permutation MinHash 서명 (빈 버킷은 오른쪽 버킷 값으로 채움)"""
+    signature = [_EMPTY] * num_hashes
+    for token in tokens:
+        h = zlib.crc32(token.encode("utf-8"))
+        bucket, value = h % num_hashes, h // num_hashes
+        if value < signature[bucket]:
+            signature[bucket] = value
+    if all(v == _EMPTY for v in signature):
+        return signature
+    filled = list(signature)
+    for i in range(num_hashes):
+        offset = 1
+        while filled[i] == _EMPTY:
+            value = signature[(i + offset) % num_hashes]
+            if value != _EMPTY:
+                filled[i] = value + (offset << 26)  # 빌려온 위치를 구분 (value < 2^26)
+            offset += 1
+    return filled
+
+
+def similarity(sig_a, sig_b):
+    """서명 일치 비율 (Jaccard 유사도 추정치)"""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster(records, threshold=SIMILARITY_THRESHOLD):
+    """준중복 레코드 클러스터 목록 (레코드 인덱스 목록의 목록) 반환"""
+    signatures = [minhash(shingles(record)) for record in records]
+    parent = list(range(len(records)))
+
+    for band in range(BANDS):
+        buckets = {}
+        start = band * ROWS
+        for i, signature in enumerate(signatures):
+            key = (records[i].get("error_code"), tuple(signature[start:start + ROWS]))
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            root_a, root_b = _find(parent, first), _find(parent, i)
+            if root_a != root_b and similarity(signatures[first], signature) >= threshold:
+                parent[root_b] = root_a
+
+    groups = {}
+    for i in range(len(records)):
+        groups.setdefault(_find(parent, i), []).append(i)
+    return list(groups.values())
+
+
+def canonical_document(records):
+    """클러스터의 대표 문서 - 가장 최근 레코드 기준, 발생 횟수/기간 추가"""
+    ordered = sorted(records, key=lambda r: r.get("occurred_at") or "")
+    canonical = dict(ordered[-1])
+    canonical["occurrence_count"] = len(records)
+    canonical["first_occurred_at"] = ordered[0].get("occurred_at")
+    canonical["last_occurred_at"] = ordered[-1].get("occurred_at")
+    return canonical
+
+
+def dedup_records(records, threshold=SIMILARITY_THRESHOLD):
+    """준중복 레코드를 대표 문서로 묶은 목록 반환 (원본 순서 유지)"""
+    clusters = cluster(records, threshold)
+    clusters.sort(key=min)
+    return [canonical_document([records[i] for i in members]) for members in clusters]
+
+
+def diversify(results, k):
+    """검색 결과 다양화 - 같은 error_code가 슬롯을 독점하지 않도록 코드별 최고 점수 결과를 먼저 선택"""
+    selected, rest, seen = [], [], set()
+    for result in results:
+        code = result.get("error_code")
+        if code in seen:
+            rest.append(result)
+        else:
+            seen.add(code)
+            selected.append(result)
+    return (selected + rest)[:k]
@@ -0,0 +1,293 @@
+"""
+스케일 테스트용 합성 에러 데이터 / 질의 워크로드 생성기
+
+data/error_data.json의 30건을 템플릿으로 같은 스키마의 레코드를 JSONL로 스트리밍 생성합니다.
+같은 seed면 항상 같은 결과가 나옵니다.
+
+- error_code: 실제 코드는 Zipf 분포로 재사용 (반복 장애), 일부는 파생 코드(롱테일)
+- category / severity / related_systems: 템플릿 기반, 관련 시스템 일부 추가/누락
+- system_status: 실제 데이터의 상태 분포, 장애 시스템 1~2개에 비정상 상태 편중
+- system_resources: cpu/memory 사용률, 응답시간 등 지표
+- occurred_at: 2025-09-01부터 날짜 범위 내, 업무 시간대 집중
+- 질의: 에러 코드, 에러명/증상 패러프레이즈, 오타(자모 치환/탈락, 띄어쓰기 누락)
+
+사용법:
+    python generate_data.py --records 1000000 --queries 10000 --seed 42
+    python generate_data.py --scale 100   # 원본의 100배 (3,000건)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from corpus_snapshot import split_values
+
+DEFAULT_SOURCE = "./data/error_data.json"
+DEFAULT_RECORDS_OUT = "./data/synthetic_errors.jsonl"
+DEFAULT_QUERIES_OUT = "./data/synthetic_queries.jsonl"
+
+START_DATE = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+# 실제 데이터의 system_status 분포 (정상 105, 높은부하/일시적오류/일부지연 각 4, 지연 3, 점검중 1)
+ABNORMAL_STATUS_WEIGHTS = {"높은부하": 4, "일시적오류": 4, "일부지연": 4, "지연": 3, "점검중": 1}
+# 시간대별 발생 가중치 (0~23시, 업무 시간대 집중)
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 2, 4, 8, 10, 10, 9, 7, 9, 10, 10, 9, 8, 6, 4, 3, 2, 2, 1]
+
+BRANCHES = ["강남대리점", "종로대리점", "부산서면점", "대구동성로점", "온라인몰", "고객센터", "광주충장점", "대전둔산점"]
+DETAILS = [
+    "재시도 후 동일 증상 반복",
+    "특정 단말 모델에서 집중 발생",
+    "피크 시간대에 발생 빈도 증가",
+    "일부 고객에게만 간헐적으로 발생",
+    "배포 직후 발생",
+    "야간 배치 이후 발생",
+]
+
+PARAPHRASES = [
+    "{error_name} 에러가 발생했어요",
+    "{error_name} 해결 방법 알려주세요",
+    "{category} 중에 {error_name} 문제가 생겼어요",
+    "{category} 진행하는데 {symptom} 이렇게 나와요",
+    "고객이 {symptom} 라고 하는데 어떻게 하나요",
+    "{symptom} 원인이 뭔가요",
+    "{system} 쪽 문제로 {category}{category_josa} 안 돼요",
+]
+CODE_QUERIES = ["{error_code} 에러가 발생했어요", "{error_code} 조치 방법", "{error_code} 원인 알려줘"]
+
+# 한글 자모 (초성 19, 중성 21, 종성 28)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+# 두벌식 자판에서 자주 헷갈리는 인접 자모
+SIMILAR_CHOSEONG = {"ㄱ": "ㅋㄲ", "ㄷ": "ㅌㄸ", "ㅂ": "ㅍㅃ", "ㅅ": "ㅆ", "ㅈ": "ㅊㅉ", "ㅇ": "ㅎ", "ㄴ": "ㅁ", "ㄹ": "ㄴ"}
+SIMILAR_JUNGSEONG = {"ㅐ": "ㅔ", "ㅔ": "ㅐ", "ㅓ": "ㅕ", "ㅗ": "ㅛ", "ㅜ": "ㅠ", "ㅏ": "ㅑ", "ㅚ": "ㅙㅞ", "ㅢ": "ㅡㅣ"}
+
+
+def josa(word, with_final, without_final):
+    """마지막 글자 받침 유무에 따라 조사 선택 (예: 이/가)"""
+    last = word[-1] if word else ""
+    if "가" <= last <= "힣" and (ord(last) - 0xAC00) % 28:
+        return with_final
+    return without_final
+
+
+def load_templates(path=DEFAULT_SOURCE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def zipf_weights(n, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+class CorpusGenerator:
+    """템플릿 레코드로부터 합성 레코드를 생성 (seed 고정 시 결정적)"""
+
+    def __init__(self, templates, seed=42, days=30, long_tail_ratio=0.1, long_tail_codes=200):
+        self.templates = templates
+        self.rng = random.Random(seed)
+        self.days = days
+        self.long_tail_ratio = long_tail_ratio
+
+        # 반복 장애: 템플릿 순서를 섞은 뒤 Zipf 분포로 재사용
+        self.template_order = list(range(len(templates)))
+        self.rng.shuffle(self.template_order)
+        self.template_weights = zipf_weights(len(templates))
+
+        # 롱테일 파생 코드: 템플릿 기반, 코드/에러명만 다름
+        self.long_tail = [
+            (f"MSA-{100 + i:03d}", self.rng.randrange(len(templates)))
+            for i in range(long_tail_codes)
+        ]
+        self.system_pool = {}
+        for template in templates:
+            for category in split_values(template["category"]):
+                self.system_pool.setdefault(category, set()).update(split_values(template["related_systems"]))
+        self.system_pool = {category: sorted(systems) for category, systems in self.system_pool.items()}
+
+    def _pick_template(self):
+        if self.rng.random() < self.long_tail_ratio:
+            code, template_index = self.rng.choice(self.long_tail)
+            return code, self.templates[template_index], True
+        index = self.rng.choices(self.template_order, weights=self.template_weights)[0]
+        template = self.templates[index]
+        return template["error_code"], template, False
+
+    def _related_systems(self, template):
+        systems = split_values(template["related_systems"])
+        if len(systems) > 1 and self.rng.random() < 0.2:
+            systems.pop(self.rng.randrange(len(systems)))
+        if self.rng.random() < 0.3:
+            category = split_values(template["category"])[0]
+            extra = self.rng.choice(self.system_pool.get(category, systems))
+            if extra not in systems:
+                systems.append(extra)
+        return systems
+
+    def _system_status(self, systems):
+        # 장애 시스템 1~2개는 비정상 상태일 확률이 높고 나머지는 대부분 정상
+        status = {}
+        faulty = set(self.rng.sample(systems, k=min(len(systems), self.rng.choice([1, 1, 2]))))
+        labels, weights = zip(*ABNORMAL_STATUS_WEIGHTS.items())
+        for system in systems + ["네트워크"]:
+            abnormal_rate = 0.6 if system in faulty else 0.03
+            status[system] = self.rng.choices(labels, weights=weights)[0] if self.rng.random() < abnormal_rate else "정상"
+        return status
+
+    def _system_resources(self, systems, status):
+        resources = {}
+        for system in systems:
+            load = 1.0 if status.get(system) == "정상" else 1.4
+            cpu = min(99, max(5, int(self.rng.gauss(55 * load, 12))))
+            memory = min(99, max(10, int(self.rng.gauss(60 * load, 10))))
+            metrics = {"cpu_usage": f"{cpu}%", "memory_usage": f"{memory}%"}
+            if self.rng.random() < 0.5:
+                metrics["response_time"] = f"{self.rng.lognormvariate(0.2, 0.5) * load:.1f}s"
+            if self.rng.random() < 0.3:
+                metrics["success_rate"] = f"{min(99.9, self.rng.gauss(97, 2) / load):.1f}%"
+            if self.rng.random() < 0.2:
+                metrics["queue_length"] = str(int(self.rng.expovariate(1 / (20 * load))))
+            resources[system] = metrics
+        return resources
+
+    def _occurred_at(self):
+        day = self.rng.randrange(self.days)
+        hour = self.rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+        moment = START_DATE + timedelta(days=day, hours=hour, seconds=self.rng.randrange(3600))
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def record(self, record_id):
+        error_code, template, long_tail = self._pick_template()
+        systems = self._related_systems(template)
+        status = self._system_status(systems)
+        record = dict(template)
+        record["id"] = str(record_id)
+        record["error_code"] = error_code
+        if long_tail:
+            record["error_name"] = f"{template['error_name']} ({error_code[-3:]}형)"
+
+        # 같은 코드라도 발생 상황 설명이 조금씩 다른 준중복 레코드
+        detail = f" [{self.rng.choice(BRANCHES)}, {self.rng.choice(DETAILS)}]"
+        record["description"] = template["description"] + detail
+        if self.rng.random() < 0.3:
+            record["symptoms"] = template["symptoms"] + f" (발생 {self.rng.randint(2, 50)}건)"
+
+        record["related_systems"] = ", ".join(systems)
+        record["occurred_at"] = self._occurred_at()
+        record["system_status"] = status
+        record["system_resources"] = self._system_resources(systems, status)
+        return record
+
+    def records(self, count):
+        for record_id in range(1, count + 1):
+            yield self.record(record_id)
+
+
+def _typo_syllable(rng, char):
+    """한글 음절 하나에 자모 단위 오타 적용 (초성/중성 치환 또는 종성 탈락)"""
+    code = ord(char) - 0xAC00
+    if not 0 <= code < 11172:
+        return char
+    cho, jung, jong = code // 588, (code % 588) // 28, code % 28
+    choice = rng.random()
+    if jong and choice < 0.4:
+        jong = 0
+    elif choice < 0.7 and CHOSEONG[cho] in SIMILAR_CHOSEONG:
+        cho = CHOSEONG.index(rng.choice(SIMILAR_CHOSEONG[CHOSEONG[cho]]))
+    elif JUNGSEONG[jung] in SIMILAR_JUNGSEONG:
+        jung = JUNGSEONG.index(rng.choice(SIMILAR_JUNGSEONG[JUNGSEONG[jung]]))
+    return chr(0xAC00 + cho * 588 + jung * 28 + jong)
+
+
+def add_typos(rng, text, count=1):
+    """자모 오타, 글자 누락/중복, 띄어쓰기 누락 중 하나를 count번 적용"""
+    chars = list(text)
+    for _ in range(count):
+        hangul = [i for i, c in enumerate(chars) if "가" <= c <= "힣"]
+        kind = rng.random()
+        if kind < 0.5 and hangul:
+            i = rng.choice(hangul)
+            chars[i] = _typo_syllable(rng, chars[i])
+        elif kind < 0.7 and len(hangul) > 4:
+            del chars[rng.choice(hangul)]
+        elif kind < 0.8 and hangul:
+            i = rng.choice(hangul)
+            chars.insert(i, chars[i])
+        elif " " in chars:
+            del chars[rng.choice([i for i, c in enumerate(chars) if c == " "])]
+    return "".join(chars)
+
+
+def generate_queries(templates, count, seed=42, typo_rate=0.3):
+    """질의 워크로드 생성 - {"query", "expected_error_code", "kind"}"""
+    rng = random.Random(seed + 1)
+    order = list(range(len(templates)))
+    rng.shuffle(order)
+    weights = zipf_weights(len(templates))
+
+    for query_id in range(1, count + 1):
+        template = templates[rng.choices(order, weights=weights)[0]]
+        if rng.random() < 0.15:
+            kind = "code"
+            query = rng.choice(CODE_QUERIES).format(error_code=template["error_code"])
+        else:
+            kind = "paraphrase"
+            symptom = template["symptoms"].split("'")[1] if "'" in template["symptoms"] else template["error_name"]
+            category = rng.choice(split_values(template["category"]))
+            query = rng.choice(PARAPHRASES).format(
+                error_name=template["error_name"],
+                category=category,
+                category_josa=josa(category, "이", "가"),
+                symptom=symptom,
+                system=rng.choice(split_values(template["related_systems"])),
+            )
+            if rng.random() < typo_rate:
+                kind = "typo"
+                query = add_typos(rng, query, count=rng.choice([1, 1, 2]))
+        yield {"id": str(query_id), "query": query, "expected_error_code": template["error_code"], "kind": kind}
+
+
+def write_jsonl(items, path):
+    """JSONL로 스트리밍 저장 (임시 파일 작성 후 교체) - 저장 건수 반환"""
+    count = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 에러 데이터 / 질의 워크로드 생성")
+    parser.add_argument("--records", type=int, help="생성할 레코드 수")
+    parser.add_argument("--scale", type=float, default=10, help="원본 대비 배수 (--records 미지정 시)")
+    parser.add_argument("--queries", type=int, default=1000, help="생성할 질의 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=30, help="occurred_at 날짜 범위 (2025-09-01부터)")
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--out", default=DEFAULT_RECORDS_OUT)
+    parser.add_argument("--queries-out", default=DEFAULT_QUERIES_OUT)
+    args = parser.parse_args(argv)
+
+    templates = load_templates(args.source)
+    count = args.records or int(len(templates) * args.scale)
+
+    started = time.perf_counter()
+    generator = CorpusGenerator(templates, seed=args.seed, days=args.days)
+    written = write_jsonl(generator.records(count), args.out)
+    elapsed = time.perf_counter() - started
+    print(f"✅ 레코드 {written:,}건 생성: {args.out} ({elapsed:.1f}s, {written / max(elapsed, 1e-9):,.0f}건/s)")
+
+    written = write_jsonl(generate_queries(templates, args.queries, seed=args.seed), args.queries_out)
+    print(f"✅ 질의 {written:,}건 생성: {args.queries_out}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
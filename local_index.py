@@ -0,0 +1,113 @@
+import os
+import re
+
+from corpus_snapshot import CorpusSnapshot, DEFAULT_SNAPSHOT_PATH
+from shard_routing import ShardedSearchClient, sharding_enabled, split_by_category, load_error_code_categories
+from dedup import dedup_enabled, dedup_records
+
+# 검색 대상 필드와 가중치 (Azure Search 인덱스의 SearchableField 기준)
+SEARCHABLE_FIELDS = {
+    "error_code": 3.0,
+    "error_name": 2.0,
+    "symptoms": 1.5,
+    "description": 1.0,
+    "solution": 1.0,
+    "category": 1.0,
+    "related_systems": 1.0,
+    "monitoring_points": 0.5,
+    "prevention": 0.5,
+    "system_status": 0.5,
+}
+
+_TOKEN_PATTERN = re.compile(r"[0-9A-Za-z가-힣-]+")
+
+
+def tokenize(text):
+    """텍스트를 바이그램 토큰 집합으로 변환 (한글 조사 등에 영향 받지 않도록 2글자 단위)"""
+    grams = set()
+    for word in _TOKEN_PATTERN.findall(str(text).lower()):
+        if len(word) < 2:
+            grams.add(word)
+            continue
+        grams.add(word)
+        for i in range(len(word) - 1):
+            grams.add(word[i:i + 2])
+    return grams
+
+
+def read_snapshot(path):
+    """바이너리 스냅샷을 메모리 매핑하여 인덱스 문서 목록으로 로드"""
+    with CorpusSnapshot(path) as snapshot:
+        return snapshot.documents()
+
+
+class LocalSearchClient:
+    """Azure SearchClient.search()와 같은 형태로 결과를 반환하는 로컬 인덱스"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self._ids = None
+        self._postings = {}
+        for doc_id, doc in enumerate(documents):
+            for field, weight in SEARCHABLE_FIELDS.items():
+                for gram in tokenize(doc.get(field) or ""):
+                    postings = self._postings.setdefault(gram, {})
+                    postings[doc_id] = postings.get(doc_id, 0.0) + weight
+
+    @classmethod
+    def from_snapshot(cls, path=DEFAULT_SNAPSHOT_PATH):
+        return cls(read_snapshot(path))
+
+    def _score(self, search_text):
+        if not search_text or search_text.strip() == "*":
+            return [(1.0, doc_id) for doc_id in range(len(self.documents))]
+
+        query_grams = tokenize(search_text)
+        scores = {}
+        for gram in query_grams:
+            for doc_id, weight in self._postings.get(gram, {}).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        ranked = [(score / len(query_grams), doc_id) for doc_id, score in scores.items()]
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return ranked
+
+    def search(self, search_text="*", top=50, select=None, include_total_count=False, **kwargs):
+        """search_text 기준 상위 top개 문서 반환 (select 지정 시 해당 필드만 포함)"""
+        if isinstance(select, str):
+            select = [field.strip() for field in select.split(",")]
+
+        results = []
+        for score, doc_id in self._score(search_text)[:top]:
+            doc = self.documents[doc_id]
+            result = {k: v for k, v in doc.items() if k in select} if select else dict(doc)
+            result["@search.score"] = score
+            results.append(result)
+        return results
+
+
+    def get_document(self, key):
+        """문서 ID로 조회 (Azure SearchClient.get_document()와 같은 용도, 없으면 KeyError)"""
+        if self._ids is None:
+            self._ids = {doc.get("id"): doc_id for doc_id, doc in enumerate(self.documents)}
+        return dict(self.documents[self._ids[key]])
+
+
+def init_local_search_client(path=None):
+    """로컬 스냅샷 클라이언트 생성 (스냅샷이 없으면 None, 샤딩 시 카테고리별 세그먼트)"""
+    path = path or os.getenv("AZURE_SEARCH_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+    if not os.path.exists(path):
+        return None
+    try:
+        documents = read_snapshot(path)
+    except (OSError, ValueError):
+        return None
+    if dedup_enabled():
+        documents = dedup_records(documents)  # Azure 인덱스와 같은 대표 문서 단위로 검색
+
+    if sharding_enabled():
+        segments = {
+            category: LocalSearchClient(shard_documents)
+            for category, shard_documents in split_by_category(documents).items()
+        }
+        return ShardedSearchClient(segments, load_error_code_categories(path))
+    return LocalSearchClient(documents)
@@ -0,0 +1,417 @@
+"""
+프로세스 / 세션 메모리 예산 및 사용량 집계
+
+캐시와 세션 저장소(채팅 기록)별로 항목 수, 대략적인 바이트, 제거 횟수를 집계하고
+바이트 예산을 넘으면 오래된 항목부터 제거합니다.
+    cache    : 예산 초과 시 LRU 순서로 제거 (결과 카드 등)
+    session  : 세션별 채팅 기록 - 세션 예산 초과 시 오래된 대화부터 질문 + 답변 한 턴씩 제거 (첫 안내 메시지와 최근 메시지는 유지)
+    resident : 검색 인덱스, 그래프 등 제거할 수 없는 상주 객체 - 크기만 집계 (조회할 때 표본 추출로 측정, 예산에서 제외)
+
+설정:
+    MEMORY_BUDGET_MB=512              프로세스 전체 캐시 + 세션 예산 (상주 객체 제외, 0이면 제한 없음)
+    SESSION_MEMORY_BUDGET_MB=2        세션별 채팅 기록 예산 (0이면 제한 없음)
+    MEMORY_METRICS_PATH=              Prometheus 텍스트 형식 지표 파일 경로 (node_exporter textfile collector 등)
+    MEMORY_METRICS_INTERVAL_SEC=15    지표 파일 갱신 최소 간격
+    MEMORY_ADMIN_TOKEN=비밀값          ?memory=비밀값 쿼리 파라미터가 있으면 사이드바에 관리자 화면 표시
+"""
+
+import os
+import sys
+import time
+import weakref
+import threading
+from array import array
+from collections import OrderedDict
+
+MB = 1024 * 1024
+SESSION_KEEP_MESSAGES = 2   # 세션 예산을 넘어도 남겨 두는 최근 메시지 수 (첫 안내 메시지 별도, 최근 질문 + 답변 한 턴)
+SAMPLE_LIMIT = 200          # approx_size가 컨테이너마다 측정하는 최대 항목 수
+
+_SCALARS = (int, float, bool, complex, type(None))
+
+
+def _env_bytes(name, default_mb):
+    try:
+        return int(float(os.getenv(name, default_mb)) * MB)
+    except ValueError:
+        return int(default_mb * MB)
+
+
+def _children(item):
+    if isinstance(item, dict):
+        return len(item), (value for pair in item.items() for value in pair), 2
+    if isinstance(item, (list, tuple, set, frozenset)):
+        return len(item), iter(item), 1
+    if hasattr(item, "__dict__") and not callable(item) and not isinstance(item, type):
+        return 1, iter((vars(item),)), 1
+    return 0, iter(()), 1
+
+
+def approx_size(obj, sample_limit=SAMPLE_LIMIT):
+    """객체와 그 안에 담긴 값들의 대략적인 메모리 크기 (sys.getsizeof 합계, 공유 객체는 한 번만)
+
+    항목이 sample_limit개를 넘는 컨테이너는 고르게 뽑은 일부만 측정하여 전체 크기를 추정
+    """
+    seen = set()
+    total = 0.0
+    stack = [(obj, 1.0)]
+    while stack:
+        item, weight = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        try:
+            total += sys.getsizeof(item) * weight
+        except TypeError:
+            continue
+        if isinstance(item, (str, bytes, bytearray, array) + _SCALARS):
+            continue
+        if isinstance(item, memoryview):
+            total += item.nbytes * weight
+            continue
+        count, children, group = _children(item)
+        if not count:
+            continue
+        if sample_limit and count > sample_limit:
+            # 키/값 쌍 단위로 step개마다 하나씩 측정하고 가중치를 곱함
+            step = -(-count // sample_limit)
+            grouped = zip(*[children] * group)
+            children = (child for i, pair in enumerate(grouped) if i % step == 0 for child in pair)
+            weight *= step
+        stack.extend((child, weight) for child in children)
+    return int(total)
+
+
+class LRUCache:
+    """바이트 크기를 집계하는 LRU 캐시 (max_entries / max_bytes 초과 시 오래된 항목부터 제거)"""
+
+    kind = "cache"
+
+    def __init__(self, name, max_entries=None, max_bytes=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()   # key → (value, size)
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = approx_size(key) + approx_size(value)
+        with self._lock:
+            if key in self._items:
+                self.bytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            while self._items and (
+                (self.max_entries is not None and len(self._items) > self.max_entries)
+                or (self.max_bytes is not None and self.bytes > self.max_bytes)
+            ):
+                self._pop_oldest()
+        return value
+
+    def _pop_oldest(self):
+        _, (_, size) = self._items.popitem(last=False)
+        self.bytes -= size
+        self.evictions += 1
+        return size
+
+    def evict(self, nbytes):
+        """nbytes 이상 확보할 때까지 오래된 항목 제거 - 확보한 바이트 반환"""
+        freed = 0
+        with self._lock:
+            while self._items and freed < nbytes:
+                freed += self._pop_oldest()
+        return freed
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._items)
+            self._items.clear()
+            self.bytes = 0
+
+
+class SessionLedger:
+    """세션 하나의 채팅 기록(messages 리스트) 크기 집계 및 세션 예산 적용"""
+
+    def __init__(self, session_id, messages, budget):
+        self.session_id = session_id
+        self.messages = messages
+        self.budget = budget
+        self.bytes = 0
+        self.evictions = 0
+        self._sizes = []
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self):
+        return len(self._sizes)
+
+    def sync(self):
+        """새로 추가된 메시지만 크기를 계산하고 세션 예산을 넘으면 오래된 메시지 제거 - 제거한 수 반환"""
+        with self._lock:
+            if len(self.messages) < len(self._sizes):
+                # 외부에서 기록을 비운 경우 처음부터 다시 집계
+                self._sizes, self.bytes = [], 0
+            for message in self.messages[len(self._sizes):]:
+                size = approx_size(message)
+                self._sizes.append(size)
+                self.bytes += size
+            evictions = self.evictions
+            while self.budget and self.bytes > self.budget and self._evict_oldest():
+                pass
+            return self.evictions - evictions
+
+    def _evict_oldest(self):
+        """가장 오래된 대화 한 턴(질문 + 답변)을 함께 제거 - 제거한 바이트 반환
+
+        질문만 남거나 답변만 남지 않도록 1번부터 다음 사용자 메시지 전까지를 한 번에 제거합니다.
+        0번(안내 메시지)과 최근 SESSION_KEEP_MESSAGES개는 유지합니다.
+        """
+        if len(self._sizes) <= 1 + SESSION_KEEP_MESSAGES:
+            return 0
+        end = 2
+        while end < len(self._sizes) and self.messages[end].get("role") != "user":
+            end += 1
+        if end > len(self._sizes) - SESSION_KEEP_MESSAGES:
+            return 0
+        size = sum(self._sizes[1:end])
+        del self.messages[1:end]
+        del self._sizes[1:end]
+        self.bytes -= size
+        self.evictions += end - 1
+        return size
+
+    def evict(self, nbytes):
+        freed = 0
+        with self._lock:
+            while freed < nbytes:
+                size = self._evict_oldest()
+                if not size:
+                    break
+                freed += size
+        return freed
+
+
+class MemoryAccountant:
+    """프로세스 내 캐시 / 세션 / 상주 객체 메모리 집계 및 전체 예산 적용"""
+
+    def __init__(self, budget=None, session_budget=None):
+        self.budget = _env_bytes("MEMORY_BUDGET_MB", 512) if budget is None else budget
+        self.session_budget = _env_bytes("SESSION_MEMORY_BUDGET_MB", 2) if session_budget is None else session_budget
+        self._caches = {}
+        self._resident = {}           # 이름 → [객체 참조, 항목 수, 측정한 바이트 (미측정이면 None)]
+        self._sessions = weakref.WeakValueDictionary()   # 세션이 끝나면 자동으로 빠짐
+        self._session_evictions = 0
+        self._lock = threading.Lock()
+        self._metrics_written_at = 0.0
+        self._over_budget_warned = False
+
+    # ===== 등록 =====
+    def register(self, cache):
+        with self._lock:
+            self._caches[cache.name] = cache
+        return cache
+
+    def track(self, name, obj, entries=1):
+        """상주 객체 등록 - 크기는 처음 조회할 때 표본 추출로 한 번만 측정 (페이지 로드를 막지 않도록)"""
+        try:
+            ref = weakref.ref(obj)
+        except TypeError:
+            ref = lambda: obj   # 약한 참조를 지원하지 않는 튜플 등은 그대로 보관
+        with self._lock:
+            self._resident[name] = [ref, entries, None]
+        return obj
+
+    def _resident_sizes(self):
+        """상주 객체별 (항목 수, 바이트) - 해제된 객체는 0"""
+        with self._lock:
+            resident = {name: list(entry) for name, entry in self._resident.items()}
+        sizes = {}
+        for name, (ref, entries, size) in resident.items():
+            obj = ref()
+            if obj is None:
+                sizes[name] = (0, 0)
+                continue
+            if size is None:
+                size = approx_size(obj)
+                with self._lock:
+                    if name in self._resident and self._resident[name][0] is ref:
+                        self._resident[name][2] = size
+            sizes[name] = (entries, size)
+        return sizes
+
+    def session(self, session_id, messages):
+        """세션 채팅 기록 집계기 - 호출한 쪽이 세션 상태에 보관해야 세션 종료 시 함께 정리됨"""
+        with self._lock:
+            ledger = self._sessions.get(session_id)
+            if ledger is None or ledger.messages is not messages:
+                ledger = SessionLedger(session_id, messages, self.session_budget)
+                self._sessions[session_id] = ledger
+            return ledger
+
+    # ===== 예산 적용 =====
+    def evictable_bytes(self):
+        """예산 적용 대상(캐시 + 세션) 바이트 - 상주 객체는 제거할 수 없으므로 제외"""
+        with self._lock:
+            caches = list(self._caches.values())
+            sessions = list(self._sessions.values())
+        return sum(c.bytes for c in caches) + sum(s.bytes for s in sessions)
+
+    def enforce(self):
+        """캐시 + 세션이 전체 예산을 넘으면 캐시(LRU) → 큰 세션의 오래된 메시지 순으로 제거 - 확보한 바이트 반환"""
+        if not self.budget:
+            return 0
+        excess = self.evictable_bytes() - self.budget
+        if excess <= 0:
+            self._over_budget_warned = False
+            return 0
+        freed = 0
+        with self._lock:
+            caches = list(self._caches.values())
+            sessions = sorted(self._sessions.values(), key=lambda s: s.bytes, reverse=True)
+        for store in caches + sessions:
+            if freed >= excess:
+                break
+            before = store.evictions
+            freed += store.evict(excess - freed)
+            if isinstance(store, SessionLedger):
+                with self._lock:
+                    self._session_evictions += store.evictions - before
+        if freed < excess and not self._over_budget_warned:
+            # 예산 아래로 내려갈 때까지 한 번만 경고
+            self._over_budget_warned = True
+            print(f"⚠️ 메모리 예산 초과: 제거 가능한 항목이 없음 ({(excess - freed) / MB:.1f}MB 초과)")
+        return freed
+
+    def account_session(self, session_id, messages, ledger=None):
+        """채팅 턴 이후 호출 - 세션 집계/세션 예산 → 전체 예산 → 지표 파일 갱신"""
+        ledger = ledger or self.session(session_id, messages)
+        evicted = ledger.sync()
+        with self._lock:
+            self._session_evictions += evicted
+        self.enforce()
+        self.write_metrics()
+        return ledger
+
+    # ===== 조회 / 내보내기 =====
+    def snapshot(self):
+        """저장소별 사용량 - [{name, kind, entries, bytes, evictions}] 와 합계"""
+        with self._lock:
+            caches = list(self._caches.values())
+            sessions = list(self._sessions.values())
+            session_evictions = self._session_evictions
+        resident = self._resident_sizes()
+        stores = [
+            {"name": c.name, "kind": c.kind, "entries": c.entries, "bytes": c.bytes, "evictions": c.evictions}
+            for c in caches
+        ]
+        stores.append({
+            "name": "chat_sessions", "kind": "session",
+            "entries": sum(s.entries for s in sessions),
+            "bytes": sum(s.bytes for s in sessions),
+            "evictions": session_evictions,
+        })
+        stores.extend(
+            {"name": name, "kind": "resident", "entries": entries, "bytes": size, "evictions": 0}
+            for name, (entries, size) in sorted(resident.items())
+        )
+        return {
+            "stores": stores,
+            "sessions": sorted(
+                ({"session_id": s.session_id, "messages": s.entries, "bytes": s.bytes, "evictions": s.evictions}
+                 for s in sessions),
+                key=lambda s: s["bytes"], reverse=True,
+            ),
+            "total_bytes": sum(store["bytes"] for store in stores),
+            "evictable_bytes": sum(store["bytes"] for store in stores if store["kind"] != "resident"),
+            "budget_bytes": self.budget,
+            "session_budget_bytes": self.session_budget,
+            "rss_bytes": process_rss(),
+        }
+
+    def prometheus(self):
+        """Prometheus 텍스트 형식 지표"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP aira_memory_bytes Approximate bytes held per cache/session store.",
+            "# TYPE aira_memory_bytes gauge",
+        ]
+        for store in snapshot["stores"]:
+            lines.append(f'aira_memory_bytes{{store="{store["name"]}",kind="{store["kind"]}"}} {store["bytes"]}')
+        lines += ["# HELP aira_memory_entries Entries per store.", "# TYPE aira_memory_entries gauge"]
+        for store in snapshot["stores"]:
+            lines.append(f'aira_memory_entries{{store="{store["name"]}",kind="{store["kind"]}"}} {store["entries"]}')
+        lines += ["# HELP aira_memory_evictions_total Evictions per store.", "# TYPE aira_memory_evictions_total counter"]
+        for store in snapshot["stores"]:
+            lines.append(f'aira_memory_evictions_total{{store="{store["name"]}",kind="{store["kind"]}"}} {store["evictions"]}')
+        lines += [
+            "# TYPE aira_memory_total_bytes gauge",
+            f"aira_memory_total_bytes {snapshot['total_bytes']}",
+            "# HELP aira_memory_evictable_bytes Cache and session bytes counted against the process budget.",
+            "# TYPE aira_memory_evictable_bytes gauge",
+            f"aira_memory_evictable_bytes {snapshot['evictable_bytes']}",
+            "# TYPE aira_memory_budget_bytes gauge",
+            f'aira_memory_budget_bytes{{scope="process"}} {snapshot["budget_bytes"]}',
+            f'aira_memory_budget_bytes{{scope="session"}} {snapshot["session_budget_bytes"]}',
+            "# TYPE aira_memory_sessions gauge",
+            f"aira_memory_sessions {len(snapshot['sessions'])}",
+        ]
+        if snapshot["rss_bytes"] is not None:
+            lines += ["# TYPE aira_process_rss_bytes gauge", f"aira_process_rss_bytes {snapshot['rss_bytes']}"]
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path=None, force=False):
+        """MEMORY_METRICS_PATH에 지표 파일 저장 (MEMORY_METRICS_INTERVAL_SEC 간격으로만)"""
+        path = path or os.getenv("MEMORY_METRICS_PATH", "")
+        if not path:
+            return False
+        now = time.monotonic()
+        if not force and now - self._metrics_written_at < float(os.getenv("MEMORY_METRICS_INTERVAL_SEC", "15")):
+            return False
+        self._metrics_written_at = now
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"⚠️ 메모리 지표 저장 실패: {e}")
+            return False
+
+
+def process_rss():
+    """현재 프로세스 RSS (리눅스 /proc 기준, 확인할 수 없으면 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def is_admin(query_params=None):
+    """?memory=<MEMORY_ADMIN_TOKEN> 요청인지 확인"""
+    token = os.getenv("MEMORY_ADMIN_TOKEN", "")
+    return bool(token) and query_params is not None and query_params.get("memory") == token
+
+
+# 프로세스 전체에서 공유하는 집계기 (Streamlit 재실행 사이에도 모듈은 유지됨)
+accountant = MemoryAccountant()
@@ -0,0 +1,234 @@
+"""
+스크립트 스레드 샘플링 프로파일러
+
+한 번의 스크립트 실행(채팅 턴) 동안 별도 스레드가 스크립트 스레드의 스택을 주기적으로 수집하고,
+stage()로 표시한 파이프라인 단계별로 집계하여 collapsed-stack / speedscope 파일로 저장합니다.
+
+활성화 (기본 비활성):
+    PROFILE_SAMPLE_RATE=0.01        전체 실행 중 1%만 프로파일링
+    PROFILE_ADMIN_TOKEN=비밀값       ?profile=비밀값 쿼리 파라미터가 있으면 해당 실행을 프로파일링
+    PROFILE_DIR=./profiles          결과 저장 경로
+    PROFILE_MAX_FILES=50            보관할 최대 프로파일 수 (오래된 것부터 삭제)
+    PROFILE_INTERVAL_MS=10          샘플링 간격
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_PROFILE_DIR = "./profiles"
+UNTAGGED_STAGE = "other"
+
+_local = threading.local()
+
+
+class SamplingProfiler:
+    """대상 스레드의 스택을 주기적으로 샘플링하여 (단계, 스택)별 횟수로 집계"""
+
+    def __init__(self, thread_id=None, interval=0.01):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self.label = "run"
+        self.started_at = None
+        self.elapsed = 0.0
+        self._stage = UNTAGGED_STAGE
+        self._root_depth = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, root_frame=None):
+        # root_frame 바깥쪽 프레임(Streamlit 스크립트 실행기 등)은 집계에서 제외
+        frame = root_frame.f_back if root_frame is not None else None
+        while frame is not None:
+            self._root_depth += 1
+            frame = frame.f_back
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    @contextmanager
+    def stage(self, name):
+        previous = self._stage
+        self._stage = name
+        try:
+            yield
+        finally:
+            self._stage = previous
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._sample(frame, self._stage)
+
+    def _sample(self, frame, stage):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.reverse()
+        key = (stage, tuple(stack[self._root_depth:]))
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.samples += 1
+
+    def stage_totals(self):
+        """단계별 샘플 수"""
+        totals = {}
+        for (stage, _), count in self.counts.items():
+            totals[stage] = totals.get(stage, 0) + count
+        return totals
+
+    def collapsed(self):
+        """collapsed-stack 형식 (flamegraph.pl, speedscope 등에서 사용) - 첫 프레임은 단계명"""
+        return "\n".join(
+            f"{';'.join((stage,) + stack)} {count}"
+            for (stage, stack), count in sorted(self.counts.items())
+        ) + "\n"
+
+    def speedscope(self, name):
+        """speedscope 파일 형식 - 단계별로 하나의 프로파일"""
+        frames, frame_index = [], {}
+        profiles = {}
+        interval_ms = self.interval * 1000
+        for (stage, stack), count in sorted(self.counts.items()):
+            indices = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indices.append(frame_index[label])
+            profile = profiles.setdefault(stage, {"samples": [], "weights": []})
+            profile["samples"].append(indices)
+            profile["weights"].append(count * interval_ms)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "aira-profiler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": stage,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(profile["weights"]),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for stage, profile in profiles.items()
+            ],
+        }
+
+    def export(self, directory, name):
+        """collapsed / speedscope 파일 저장 후 경로 반환"""
+        os.makedirs(directory, exist_ok=True)
+        collapsed_path = os.path.join(directory, f"{name}.collapsed.txt")
+        speedscope_path = os.path.join(directory, f"{name}.speedscope.json")
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        with open(speedscope_path, "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(name), f, ensure_ascii=False)
+        return collapsed_path, speedscope_path
+
+
+def enforce_retention(directory, max_profiles):
+    """가장 오래된 프로파일부터 삭제하여 max_profiles개만 유지"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    runs = {}
+    for filename in names:
+        if filename.endswith((".collapsed.txt", ".speedscope.json")):
+            path = os.path.join(directory, filename)
+            run = filename.split(".", 1)[0]
+            runs.setdefault(run, []).append(path)
+    stale = sorted(runs)[:max(0, len(runs) - max_profiles)]  # 파일명이 시각으로 시작하므로 정렬 = 시간순
+    for run in stale:
+        for path in runs[run]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def should_profile(query_params=None):
+    """이번 실행을 프로파일링할지 결정 (관리자 쿼리 파라미터 또는 샘플링 비율)"""
+    token = os.getenv("PROFILE_ADMIN_TOKEN", "")
+    if token and query_params is not None and query_params.get("profile") == token:
+        return True
+    try:
+        rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    except ValueError:
+        return False
+    return rate > 0 and random.random() < rate
+
+
+def _env_positive(name, default, cast=float):
+    """양수 환경 변수 값 (비어 있거나 잘못된 값이면 기본값 - 프로파일 설정 오류로 페이지가 실패하지 않도록)"""
+    try:
+        value = cast(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+@contextmanager
+def profile_run(enabled, label="run"):
+    """enabled이면 블록 실행 동안 현재 스레드를 샘플링하고 결과를 파일로 저장"""
+    if not enabled:
+        yield None
+        return
+
+    interval = _env_positive("PROFILE_INTERVAL_MS", 10.0) / 1000
+    profiler = SamplingProfiler(interval=interval)
+    profiler.label = label
+    _local.profiler = profiler
+    profiler.start(root_frame=sys._getframe(2))  # with 문을 실행한 프레임부터 집계
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _local.profiler = None
+        if profiler.samples:
+            directory = os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+            name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:6]}-{profiler.label}"
+            try:
+                profiler.export(directory, name)
+                enforce_retention(directory, _env_positive("PROFILE_MAX_FILES", 50, int))
+            except OSError as e:
+                print(f"⚠️ 프로파일 저장 실패: {e}")
+
+
+@contextmanager
+def stage(name):
+    """파이프라인 단계 표시 (프로파일링 중이 아니면 아무 것도 하지 않음)"""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def tag(label):
+    """현재 프로파일 결과 파일명에 붙일 라벨 지정 (예: 채팅 턴이 있었던 실행은 chat)"""
+    profiler = getattr(_local, "profiler", None)
+    if profiler is not None:
+        profiler.label = label
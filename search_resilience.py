@@ -0,0 +1,223 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# 서킷 브레이커 상태
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Azure Search 호출의 오류율/지연을 추적하는 서킷 브레이커"""
+
+    def __init__(self, window_size=50, min_calls=5, failure_rate_threshold=0.5,
+                 slow_call_threshold=3.0, cooldown=30.0):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.cooldown = cooldown
+
+        self._outcomes = deque(maxlen=window_size)   # True = 실패 또는 느린 호출
+        self._latencies = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """Azure Search 호출 허용 여부 (OPEN 상태에서는 쿨다운 후 1건만 시험 호출)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            if self._probe_in_flight:
+                return False
+            self._state = HALF_OPEN
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency, probe=False):
+        self._record(latency, failed=latency >= self.slow_call_threshold, probe=probe)
+
+    def record_failure(self, latency=None, probe=False):
+        """실패 기록 (latency가 None이면 지연 표본 없이 실패만 집계 - 시작도 못 한 호출 등)"""
+        self._record(latency, failed=True, probe=probe)
+
+    def _record(self, latency, failed, probe=False):
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            self._outcomes.append(failed)
+
+            if self._state == HALF_OPEN:
+                # 시험 호출 결과로만 상태 전환 (OPEN 이전에 시작되어 늦게 끝난 호출은 집계만)
+                if not probe:
+                    return
+                self._probe_in_flight = False
+                if failed:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failure_rate = sum(self._outcomes) / len(self._outcomes)
+                if failure_rate >= self.failure_rate_threshold:
+                    self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    def trip(self):
+        """외부에서 강제로 OPEN 상태로 전환 (초기 연결 실패 등)"""
+        with self._lock:
+            self._trip()
+
+    def latency_percentile(self, percentile=0.95):
+        """최근 호출 지연시간의 백분위수 (표본이 부족하면 None)"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_calls:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile))
+        return samples[index]
+
+    def snapshot(self):
+        """현재 상태 요약 (사이드바 표시용)"""
+        with self._lock:
+            calls = len(self._outcomes)
+            failure_rate = sum(self._outcomes) / calls if calls else 0.0
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": failure_rate,
+            "p95": self.latency_percentile(0.95),
+        }
+
+
+class ResilientSearchClient:
+    """Azure Search(primary)와 로컬 스냅샷(fallback)을 묶은 검색 클라이언트
+
+    - 브레이커가 OPEN이면 곧바로 로컬 스냅샷으로 응답 (fail-open)
+    - primary가 p95 데드라인(최대 timeout)을 넘기면 로컬 스냅샷으로 응답 (헤지)
+      버려진 primary는 끝까지 실행하여 실제 지연/결과를 기록하고, 예외 또는 timeout 초과만 실패로 집계
+    - 쿨다운 후 시험 호출(HALF_OPEN)은 p95 데드라인이 아니라 timeout까지 기다림
+    """
+
+    def __init__(self, primary, fallback, breaker=None, hedge_min=0.3, hedge_max=2.0,
+                 timeout=10.0, max_workers=8):
+        self.primary = primary
+        self.fallback = fallback
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+    def hedge_deadline(self):
+        """헤지 요청 전 대기 시간 (관측된 p95를 hedge_min~hedge_max 범위로 제한)"""
+        p95 = self.breaker.latency_percentile(0.95)
+        if p95 is None:
+            return self.hedge_max
+        return min(self.hedge_max, max(self.hedge_min, p95))
+
+    def _search_primary(self, search_text, kwargs):
+        # Azure SDK는 결과를 순회할 때 요청하므로 여기서 모두 가져옴
+        return list(self.primary.search(search_text=search_text, **kwargs))
+
+    def _search_fallback(self, search_text, kwargs):
+        return self.fallback.search(search_text=search_text, **kwargs)
+
+    def get_document(self, key):
+        """문서 ID로 조회 - 로컬 스냅샷을 먼저 보고, 없으면 Azure Search (결과 카드 재생성용)"""
+        if self.fallback is not None:
+            try:
+                return self.fallback.get_document(key)
+            except KeyError:
+                if self.primary is None:
+                    raise
+        return self.primary.get_document(key=key)
+
+    def search(self, search_text="*", **kwargs):
+        if self.primary is None:
+            return self._search_fallback(search_text, kwargs)
+        if self.fallback is None:
+            call = _PrimaryCall(self.breaker, self.timeout)
+            try:
+                results = self._search_primary(search_text, kwargs)
+            except Exception:
+                call.finish(failed=True)
+                raise
+            call.finish(failed=False)
+            return results
+        if not self.breaker.allow_request():
+            return self._search_fallback(search_text, kwargs)
+
+        probe = self.breaker.state == HALF_OPEN
+        call = _PrimaryCall(self.breaker, self.timeout, probe=probe)
+        primary = self._executor.submit(self._search_primary, search_text, kwargs)
+        primary.add_done_callback(call.done)
+        deadline = self.timeout if probe else min(self.hedge_deadline(), self.timeout)
+        done, _ = wait([primary], timeout=deadline)
+        if done and primary.exception() is None:
+            return primary.result()
+
+        if not done and not primary.cancel():
+            # 실행 중인 primary는 계속 두고 timeout이 지나도 끝나지 않으면 그때 실패로 기록
+            call.watch()
+        # 로컬 스냅샷은 작업자 풀을 거치지 않고 호출 스레드에서 바로 조회
+        return self._search_fallback(search_text, kwargs)
+
+
+class _PrimaryCall:
+    """primary 호출 1건의 결과를 브레이커에 한 번만 기록 (완료 / timeout 초과 / 시작 전 취소 중 먼저 일어난 쪽)"""
+
+    def __init__(self, breaker, timeout, probe=False):
+        self.breaker = breaker
+        self.timeout = timeout
+        self.probe = probe
+        self.started = time.monotonic()
+        self._recorded = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def watch(self):
+        """timeout 시점까지 끝나지 않으면 실패로 기록"""
+        remaining = max(0.0, self.timeout - (time.monotonic() - self.started))
+        self._timer = threading.Timer(remaining, self.finish, kwargs={"failed": True})
+        self._timer.daemon = True
+        self._timer.start()
+
+    def done(self, future):
+        """작업자 풀 완료 콜백 - 실제 지연과 결과 기록"""
+        if self._timer is not None:
+            self._timer.cancel()
+        if future.cancelled():
+            # 작업자가 모두 막혀 시작도 못 한 호출 - 지연 표본 없이 실패만 집계
+            self.finish(failed=True, sample=False)
+        else:
+            self.finish(failed=future.exception() is not None)
+
+    def finish(self, failed, sample=True):
+        with self._lock:
+            if self._recorded:
+                return
+            self._recorded = True
+        latency = time.monotonic() - self.started
+        if failed or latency >= self.timeout:
+            self.breaker.record_failure(latency if sample else None, probe=self.probe)
+        else:
+            self.breaker.record_success(latency, probe=self.probe)
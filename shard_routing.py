@@ -0,0 +1,159 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus_snapshot import CorpusSnapshot, split_values
+
+# 카테고리별 샤드 (Azure Search 인덱스 이름은 영문 소문자/숫자/대시만 허용)
+CATEGORY_SHARDS = {
+    "신규개통": "new",
+    "번호이동": "port",
+    "기기변경": "device",
+}
+
+# 쿼리 분류용 키워드와 가중치 (카테고리명 자체가 가장 강한 신호)
+CATEGORY_KEYWORDS = {
+    "신규개통": {"신규개통": 3, "신규": 2, "가입": 1, "본인인증": 1, "신용": 1, "미성년": 1,
+               "외국인": 1, "법인": 1, "미납": 1, "가족": 1},
+    "번호이동": {"번호이동": 3, "포팅": 2, "mnp": 2, "통신사": 1, "승인번호": 1, "해지": 1,
+               "명의자": 1, "이동": 1},
+    "기기변경": {"기기변경": 3, "기변": 2, "usim": 2, "유심": 2, "imei": 2, "기기": 1, "단말": 1,
+               "잠금": 1, "백업": 1, "소프트웨어": 1, "호환": 1},
+}
+
+_ERROR_CODE_PATTERN = re.compile(r"[A-Za-z]+-\d+")
+
+# Reciprocal Rank Fusion 상수 (샤드별 BM25 점수는 인덱스마다 통계가 달라 직접 비교할 수 없으므로 순위로 병합)
+RRF_K = 60
+
+
+def sharding_enabled():
+    """AZURE_SEARCH_SHARDED=true 이면 카테고리별 샤드 인덱스 사용"""
+    return os.getenv("AZURE_SEARCH_SHARDED", "false").strip().lower() in ("1", "true", "yes")
+
+
+def shard_index_name(base_name, category):
+    return f"{base_name}-{CATEGORY_SHARDS[category]}"
+
+
+def resolve_category(value):
+    """카테고리명 또는 샤드 이름(new/port/device)을 카테고리명으로 변환"""
+    for category, shard in CATEGORY_SHARDS.items():
+        if value in (category, shard):
+            return category
+    raise ValueError(f"알 수 없는 카테고리 샤드: {value}")
+
+
+def split_by_category(records):
+    """레코드를 카테고리별로 분배 (여러 카테고리에 속한 레코드는 각 샤드에 포함)"""
+    shards = {category: [] for category in CATEGORY_SHARDS}
+    for record in records:
+        for category in split_values(record.get("category", "")):
+            if category in shards:
+                shards[category].append(record)
+    return shards
+
+
+def load_error_code_categories(path):
+    """스냅샷 조회 테이블에서 에러 코드 → 카테고리 매핑 생성 (스냅샷이 없으면 빈 dict)
+
+    레코드를 디코딩하지 않고 category 조회 테이블(카테고리 → 레코드 ID)과
+    error_code 조회 테이블의 레코드 ID를 맞춰 봅니다.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with CorpusSnapshot(path) as snapshot:
+            category_records = {
+                category: set(snapshot.lookup("category", category))
+                for category in snapshot.keys("category")
+            }
+            mapping = {}
+            for code in snapshot.keys("error_code"):
+                record_ids = snapshot.lookup("error_code", code)
+                categories = mapping.setdefault(code.upper(), set())
+                categories.update(
+                    category for category, ids in category_records.items()
+                    if not ids.isdisjoint(record_ids)
+                )
+            return mapping
+    except (OSError, ValueError):
+        return {}
+
+
+def classify_query(query, error_code_categories=None):
+    """질문을 관련 카테고리 목록으로 분류 - 확신이 없으면 전체 카테고리 반환"""
+    if not query or query.strip() == "*":
+        return list(CATEGORY_SHARDS)
+
+    # 에러 코드가 포함되어 있으면 해당 코드의 카테고리로 바로 라우팅
+    if error_code_categories:
+        matched = set()
+        for code in _ERROR_CODE_PATTERN.findall(query):
+            matched |= error_code_categories.get(code.upper(), set())
+        if matched:
+            return [c for c in CATEGORY_SHARDS if c in matched]
+
+    text = query.lower().replace(" ", "")
+    scores = {
+        category: sum(weight for keyword, weight in keywords.items() if keyword in text)
+        for category, keywords in CATEGORY_KEYWORDS.items()
+    }
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    best_category, best_score = ranked[0]
+    second_score = ranked[1][1]
+    if best_score == 0:
+        return list(CATEGORY_SHARDS)
+    if best_score >= 2 * second_score:
+        return [best_category]
+    # 점수가 비슷하면 점수가 있는 샤드를 모두 조회하여 병합
+    return [category for category, score in ranked if score > 0]
+
+
+class ShardedSearchClient:
+    """카테고리 샤드별 검색 클라이언트를 묶어 질문에 맞는 샤드만 조회"""
+
+    def __init__(self, clients, error_code_categories=None):
+        self.clients = clients
+        self.error_code_categories = error_code_categories or {}
+        self._executor = ThreadPoolExecutor(max_workers=len(clients) or 1, thread_name_prefix="shard")
+
+    def route(self, search_text):
+        return [c for c in classify_query(search_text, self.error_code_categories) if c in self.clients]
+
+    def get_document(self, key):
+        """문서 ID로 조회 - 여러 샤드에 들어 있어도 내용은 같으므로 처음 찾은 것 반환"""
+        for client in self.clients.values():
+            try:
+                return client.get_document(key)
+            except Exception:   # 로컬 세그먼트는 KeyError, Azure 샤드는 ResourceNotFoundError
+                continue
+        raise KeyError(key)
+
+    def search(self, search_text="*", top=50, select=None, **kwargs):
+        categories = self.route(search_text) or list(self.clients)
+        if len(categories) == 1:
+            return list(self.clients[categories[0]].search(search_text=search_text, top=top, select=select, **kwargs))
+
+        # 샤드 간 중복 제거를 위해 id 필드는 항상 조회
+        if isinstance(select, str):
+            select = [field.strip() for field in select.split(",")]
+        strip_id = bool(select) and "id" not in select
+        shard_select = select + ["id"] if strip_id else select
+
+        def search_shard(category):
+            return list(self.clients[category].search(search_text=search_text, top=top, select=shard_select, **kwargs))
+
+        # 샤드별 순위로 점수 계산 (RRF) - 여러 샤드에 들어 있는 같은 문서는 가장 높은 순위만 사용 (중복 색인으로 가산되지 않도록)
+        merged, fused = {}, {}
+        for results in self._executor.map(search_shard, categories):
+            for rank, result in enumerate(results, start=1):
+                key = result.get("id") or id(result)
+                merged.setdefault(key, result)
+                fused[key] = max(fused.get(key, 0.0), 1.0 / (RRF_K + rank))
+        # 동점은 라우팅 순서(분류 점수가 높은 샤드 먼저) 유지
+        ranked = sorted(merged, key=lambda key: -fused[key])[:top]
+        ranked = [dict(merged[key], **{"@search.score": fused[key]}) for key in ranked]
+        if strip_id:
+            ranked = [{k: v for k, v in r.items() if k != "id"} for r in ranked]
+        return ranked
@@ -0,0 +1,305 @@
+"""
+연관 시스템 의존성 그래프 인덱스
+
+에러 레코드의 related_systems / system_status로부터 다음 두 그래프를 만들어
+시스템별 인접 배열(CSR)로 저장합니다. 한 시스템의 조회는 이웃 수에만 비례합니다.
+    시스템 → 시스템 : 같은 장애에 함께 등장한 횟수, 둘 다 이상 상태였던 횟수, 최근 발생 시각
+    시스템 → 에러 코드 : 해당 시스템이 관련된 발생 횟수, 최근 발생 시각
+
+파일 구조 (리틀엔디언, uint32 배열):
+    header  : magic, version, 시스템 수, 에러 코드 수, 상태 수, 시스템 간선 수, 에러 코드 간선 수, 문자열 블롭 길이
+    strings : 시스템명, 에러 코드, 상태명 ("\\n" 구분 UTF-8)
+    nodes   : 시스템별 최근 상태, 최근 발생 시각
+    edges   : offsets(시스템 수+1) + targets / weights / degraded / last_seen
+    incidents : offsets(시스템 수+1) + codes / weights / last_seen
+
+사용법:
+    python system_graph.py [입력 JSON/JSONL] [출력 그래프 파일]
+"""
+
+import os
+import sys
+import json
+import struct
+from array import array
+from datetime import datetime, timezone
+
+from corpus_snapshot import split_values, load_records, validate_records
+
+MAGIC = b"AIRAGRF\0"
+GRAPH_VERSION = 1
+DEFAULT_GRAPH_PATH = "./data/system_graph.bin"
+
+HEADER = struct.Struct("<8sHH6I")
+NORMAL_STATUS = "정상"
+
+
+class GraphError(ValueError):
+    """그래프 파일 형식/버전 오류"""
+
+
+def _timestamp(occurred_at):
+    """occurred_at(ISO 8601) → epoch 초 (파싱 실패 시 0)"""
+    try:
+        return int(datetime.fromisoformat(str(occurred_at).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return 0
+
+
+def _isoformat(timestamp):
+    if not timestamp:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _csr(rows, n, columns):
+    """{행: {열 키: (값, ...)}} → offsets + 열별 배열 (행마다 값 튜플 내림차순 정렬)"""
+    offsets = array("I", [0])
+    arrays = [array("I") for _ in range(columns)]
+    for row in range(n):
+        for entry in sorted(rows.get(row, {}).items(), key=lambda item: item[1], reverse=True):
+            key, values = entry
+            arrays[0].append(key)
+            for i, value in enumerate(values):
+                arrays[i + 1].append(value)
+        offsets.append(len(arrays[0]))
+    return offsets, arrays
+
+
+class SystemGraph:
+    """시스템 의존성 그래프 (build_graph로 생성하거나 load로 파일에서 로드)"""
+
+    def __init__(self, systems, codes, statuses, nodes, edges, incidents):
+        self.systems = systems
+        self.codes = codes
+        self.statuses = statuses
+        self.index = {system: i for i, system in enumerate(systems)}
+        self.node_status, self.node_last_seen = nodes
+        self.edge_offsets, self.edge_targets, self.edge_weights, self.edge_degraded, self.edge_last_seen = edges
+        self.incident_offsets, self.incident_codes, self.incident_weights, self.incident_last_seen = incidents
+
+    def __len__(self):
+        return len(self.systems)
+
+    def __contains__(self, system):
+        return system in self.index
+
+    # ===== 조회 =====
+    def status(self, system):
+        """가장 최근 장애 기록 기준 시스템 상태"""
+        i = self.index[system]
+        return self.statuses[self.node_status[i]]
+
+    def neighbors(self, system, limit=None):
+        """함께 장애가 났던 시스템 (동시 이상 횟수, 동시 등장 횟수 순)"""
+        i = self.index.get(system)
+        if i is None:
+            return []
+        start, end = self.edge_offsets[i], self.edge_offsets[i + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [
+            {
+                "system": self.systems[self.edge_targets[e]],
+                "weight": self.edge_weights[e],
+                "degraded": self.edge_degraded[e],
+                "last_seen": _isoformat(self.edge_last_seen[e]),
+            }
+            for e in range(start, end)
+        ]
+
+    def incidents(self, system, limit=None):
+        """시스템이 관련된 에러 코드 (발생 횟수 순)"""
+        i = self.index.get(system)
+        if i is None:
+            return []
+        start, end = self.incident_offsets[i], self.incident_offsets[i + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [
+            {
+                "error_code": self.codes[self.incident_codes[e]],
+                "count": self.incident_weights[e],
+                "last_seen": _isoformat(self.incident_last_seen[e]),
+            }
+            for e in range(start, end)
+        ]
+
+    def blast_radius(self, system, limit=5):
+        """시스템 장애 시 영향 범위 - 함께 이상이 났던 시스템과 관련 에러 코드"""
+        if system not in self.index:
+            return None
+        return {
+            "system": system,
+            "status": self.status(system),
+            "last_seen": _isoformat(self.node_last_seen[self.index[system]]),
+            "neighbors": self.neighbors(system, limit),
+            "incidents": self.incidents(system, limit),
+        }
+
+    def find_systems(self, text):
+        """텍스트에 이름이 등장하는 시스템 목록 (긴 이름 우선)"""
+        return sorted((system for system in self.systems if system in text), key=len, reverse=True)
+
+    def describe(self, systems, limit=3):
+        """프롬프트에 넣을 영향 범위 요약 문자열"""
+        lines = []
+        for system in systems:
+            radius = self.blast_radius(system, limit)
+            if radius is None:
+                continue
+            neighbors = ", ".join(
+                f"{n['system']}(동시 이상 {n['degraded']}회/동시 발생 {n['weight']}회)" for n in radius["neighbors"]
+            ) or "없음"
+            incidents = ", ".join(f"{i['error_code']}({i['count']}회)" for i in radius["incidents"]) or "없음"
+            lines.append(
+                f"- {system} [최근 상태: {radius['status']}, 최근 발생: {radius['last_seen'] or 'N/A'}]\n"
+                f"  함께 영향받은 시스템: {neighbors}\n"
+                f"  관련 에러 코드: {incidents}"
+            )
+        return "\n".join(lines)
+
+    # ===== 저장/로드 =====
+    def _arrays(self):
+        return [
+            self.node_status, self.node_last_seen,
+            self.edge_offsets, self.edge_targets, self.edge_weights, self.edge_degraded, self.edge_last_seen,
+            self.incident_offsets, self.incident_codes, self.incident_weights, self.incident_last_seen,
+        ]
+
+    def save(self, path=DEFAULT_GRAPH_PATH):
+        blob = "\n".join(self.systems + self.codes + self.statuses).encode("utf-8")
+        header = HEADER.pack(MAGIC, GRAPH_VERSION, 0, len(self.systems), len(self.codes), len(self.statuses),
+                             len(self.edge_targets), len(self.incident_codes), len(blob))
+        blob += b"\0" * (-len(blob) % 4)  # 이후 배열 4바이트 정렬
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(blob)
+            for arr in self._arrays():
+                if sys.byteorder != "little":
+                    arr = array("I", arr)
+                    arr.byteswap()
+                f.write(arr.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_GRAPH_PATH):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise GraphError(f"그래프 헤더 손상: {path}")
+        magic, version, _, n_systems, n_codes, n_statuses, n_edges, n_incidents, blob_len = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise GraphError(f"그래프 파일 형식이 아님: {path}")
+        if version != GRAPH_VERSION:
+            raise GraphError(f"지원하지 않는 그래프 버전: {version} (필요: {GRAPH_VERSION})")
+
+        pos = HEADER.size
+        names = data[pos:pos + blob_len].decode("utf-8").split("\n") if blob_len else []
+        if len(names) != n_systems + n_codes + n_statuses:
+            raise GraphError(f"그래프 문자열 개수 불일치: {path}")
+        pos += blob_len + (-blob_len % 4)
+
+        def take(count):
+            nonlocal pos
+            arr = array("I")
+            arr.frombytes(data[pos:pos + count * 4])
+            if sys.byteorder != "little":
+                arr.byteswap()
+            if len(arr) != count:
+                raise GraphError(f"그래프 섹션 크기 불일치: {path}")
+            pos += count * 4
+            return arr
+
+        nodes = (take(n_systems), take(n_systems))
+        edges = (take(n_systems + 1), take(n_edges), take(n_edges), take(n_edges), take(n_edges))
+        incidents = (take(n_systems + 1), take(n_incidents), take(n_incidents), take(n_incidents))
+        return cls(
+            names[:n_systems], names[n_systems:n_systems + n_codes], names[n_systems + n_codes:],
+            nodes, edges, incidents,
+        )
+
+
+def build_graph(records):
+    """에러 레코드 목록으로 시스템 의존성 그래프 생성 (system_status는 dict / JSON 문자열 모두 허용)"""
+    parsed = []
+    for record in records:
+        system_status = record.get("system_status") or {}
+        if isinstance(system_status, str):
+            try:
+                system_status = json.loads(system_status)
+            except json.JSONDecodeError:
+                system_status = {}
+        systems = set(split_values(record.get("related_systems") or "")) | set(system_status)
+        parsed.append((record, system_status, systems, _timestamp(record.get("occurred_at"))))
+
+    systems = sorted({system for _, _, record_systems, _ in parsed for system in record_systems})
+    codes = sorted({str(record.get("error_code")) for record, _, _, _ in parsed})
+    statuses = sorted({NORMAL_STATUS} | {str(s) for _, status, _, _ in parsed for s in status.values()})
+    system_ids = {system: i for i, system in enumerate(systems)}
+    code_ids = {code: i for i, code in enumerate(codes)}
+    status_ids = {status: i for i, status in enumerate(statuses)}
+
+    node_status = array("I", [status_ids[NORMAL_STATUS]] * len(systems))
+    node_last_seen = array("I", [0] * len(systems))
+    edges = {}       # 시스템 → {시스템: [동시 등장, 동시 이상, 최근 시각]}
+    incidents = {}   # 시스템 → {에러 코드: [발생 횟수, 최근 시각]}
+
+    for record, system_status, record_systems, seen in parsed:
+        ids = sorted(system_ids[system] for system in record_systems)
+        abnormal = {system_ids[s] for s, status in system_status.items() if status != NORMAL_STATUS}
+        code = code_ids[str(record.get("error_code"))]
+        for a in ids:
+            if seen >= node_last_seen[a]:
+                node_last_seen[a] = seen
+                node_status[a] = status_ids[str(system_status.get(systems[a], NORMAL_STATUS))]
+            incident = incidents.setdefault(a, {}).setdefault(code, [0, 0])
+            incident[0] += 1
+            incident[1] = max(incident[1], seen)
+            for b in ids:
+                if a == b:
+                    continue
+                edge = edges.setdefault(a, {}).setdefault(b, [0, 0, 0])
+                edge[0] += 1
+                edge[1] += a in abnormal and b in abnormal
+                edge[2] = max(edge[2], seen)
+
+    # 정렬 기준: 동시 이상 횟수 → 동시 등장 횟수 → 최근 시각
+    edge_rows = {a: {b: (d, w, t) for b, (w, d, t) in row.items()} for a, row in edges.items()}
+    edge_offsets, (targets, degraded, weights, last_seen) = _csr(edge_rows, len(systems), 4)
+    incident_offsets, (incident_codes, incident_weights, incident_last_seen) = _csr(incidents, len(systems), 3)
+    return SystemGraph(
+        systems, codes, statuses,
+        (node_status, node_last_seen),
+        (edge_offsets, targets, weights, degraded, last_seen),
+        (incident_offsets, incident_codes, incident_weights, incident_last_seen),
+    )
+
+
+def load_graph(path=None):
+    """그래프 파일 로드 (없거나 손상되었으면 None)"""
+    path = path or os.getenv("AIRA_SYSTEM_GRAPH_PATH", DEFAULT_GRAPH_PATH)
+    if not os.path.exists(path):
+        return None
+    try:
+        return SystemGraph.load(path)
+    except (OSError, GraphError):
+        return None
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "./data/error_data.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_GRAPH_PATH
+
+    valid, _ = validate_records(load_records(source))
+    graph = build_graph(valid)
+    graph.save(target)
+    print(f"✅ 시스템 그래프 생성 완료: {target} (시스템 {len(graph)}개, 간선 {len(graph.edge_targets)}개, "
+          f"{os.path.getsize(target):,} bytes)")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,10 +1,22 @@
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus_snapshot import validate_records
 
 try:
     with open('error_data.json', 'r', encoding='utf-8') as f:
         data = json.load(f)
     print(f"✅ JSON 파일이 유효합니다. {len(data)}개 레코드 발견")
     
+    # 스키마 검증 (필수 필드, category/severity 값, occurred_at 형식, system_status 값)
+    _, invalid = validate_records(data)
+    for i, errors in invalid:
+        print(f"⚠️ 항목 {i} 스키마 오류: {'; '.join(errors)}")
+    if not invalid:
+        print("✅ 모든 레코드가 스키마 검증을 통과했습니다.")
+    
     # 다시 저장해서 포맷팅 정리
     with open('error_data.json', 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
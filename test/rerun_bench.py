@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Streamlit 재실행(rerun) 시간 측정
+
+Azure 연결 없이 로컬 스냅샷(data/error_data.snap)과 고정 응답을 돌려주는
+OpenAI 대체 클라이언트로 app.py를 AppTest로 실행하고,
+채팅 기록이 쌓인 상태에서 "도움말" 버튼 클릭과 채팅 입력의 재실행 시간을 측정합니다.
+
+AppTest는 항상 스크립트 전체를 재실행하므로, 앱에 하단 버튼 fragment(render_button_bar)가
+있으면 그 함수만 AppTest.from_function으로 따로 실행하여 함께 측정합니다.
+이 값은 브라우저에서 fragment만 재실행될 때의 추정치(proxy)이며, 실제 fragment 재실행을 측정한 값은 아닙니다.
+
+변경 전후 비교:
+    git show <이전 커밋>:app.py > /tmp/app_before.py
+    python test/rerun_bench.py /tmp/app_before.py
+    python test/rerun_bench.py app.py
+
+사용법:
+    python test/rerun_bench.py [app 경로, 기본 app.py] [채팅 턴 수, 기본 10] [반복 횟수, 기본 20]
+"""
+
+import os
+import sys
+import time
+import statistics
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+QUERIES = [
+    "신규개통 시 본인인증이 안 돼요",
+    "MSA-001 에러가 발생했어요",
+    "번호이동 중에 오류가 생겼어요",
+    "기기변경 후 네트워크 연결이 안돼요",
+    "USIM 활성화가 안 돼요",
+]
+
+
+class FakeOpenAI:
+    """고정 응답을 반환하는 AzureOpenAI 대체 클라이언트 (네트워크 호출 없음)"""
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        message = SimpleNamespace(content="1. 문제 상황 분석\n2. 원인\n3. 해결 방법")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def button_bar_script(app_dir, module_name):
+    """하단 버튼 fragment만 실행하는 AppTest 스크립트"""
+    import sys
+    import importlib
+    sys.path.insert(0, app_dir)
+    importlib.import_module(module_name).render_button_bar()
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    app_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "app.py")
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    env = {
+        "AZURE_SEARCH_SERVICE_ENDPOINT": "",
+        "AZURE_SEARCH_ADMIN_KEY": "",
+        "AZURE_SEARCH_SNAPSHOT_PATH": os.path.join(ROOT, "data", "error_data.snap"),
+        "SLACK_WEBHOOK_URL": "",
+    }
+    if not os.path.exists(env["AZURE_SEARCH_SNAPSHOT_PATH"]):
+        print("❌ 로컬 스냅샷이 없습니다. 먼저 python corpus_snapshot.py를 실행하세요.")
+        return False
+
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        with mock.patch.dict(os.environ, env), mock.patch("openai.AzureOpenAI", FakeOpenAI), \
+                mock.patch("dotenv.load_dotenv", lambda *a, **k: False):
+            at = AppTest.from_file(os.path.abspath(app_path), default_timeout=30)
+            at.run()
+            if at.exception:
+                print(f"❌ 앱 실행 오류: {at.exception}")
+                return False
+
+            for i in range(turns):
+                at.chat_input[0].set_value(QUERIES[i % len(QUERIES)]).run()
+
+            rows = [
+                ("도움말 클릭 (전체 재실행)", timed(lambda: at.button(key="help_btn").click().run(), repeat)),
+                ("채팅 입력 (전체 재실행)", timed(lambda: at.chat_input[0].set_value(QUERIES[0]).run(), repeat)),
+            ]
+
+            source = open(app_path, encoding="utf-8").read()
+            if "def render_button_bar(" in source:
+                module_name = os.path.splitext(os.path.basename(app_path))[0]
+                fragment_at = AppTest.from_function(
+                    button_bar_script,
+                    args=(os.path.dirname(os.path.abspath(app_path)), module_name),
+                    default_timeout=30,
+                )
+                fragment_at.session_state["messages"] = at.session_state["messages"]
+                fragment_at.run()
+                rows.append(("도움말 클릭 (fragment만, 추정)", timed(lambda: fragment_at.button(key="help_btn").click().run(), repeat)))
+    finally:
+        os.chdir(cwd)
+
+    print(f"📊 {os.path.basename(app_path)} - 채팅 {turns}턴 이후, {repeat}회 반복")
+    print(f"{'측정 항목':<24} {'중앙값':>10} {'최대':>10}")
+    print("-" * 48)
+    for label, (median, worst) in rows:
+        print(f"{label:<24} {median:>8.1f}ms {worst:>8.1f}ms")
+    if len(rows) > 2:
+        print("* 추정: render_button_bar만 별도 AppTest(from_function)로 실행한 값")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+검색 장애 대응 점검
+- Azure Search가 응답하지 않아 작업자 풀이 모두 막힌 경우에도 데드라인 안에 로컬 스냅샷으로 응답하고
+  서킷 브레이커가 열리는지 확인합니다.
+- 브레이커 상태 전환 CLOSED → OPEN → HALF_OPEN → CLOSED 와 시험 호출이 timeout까지 기다리는지 확인합니다.
+- Azure 지연이 (느린 호출 기준보다는 빠르게) 늘어나면 p95가 따라 올라가 다시 primary로 응답하는지 확인합니다.
+
+사용법:
+    python test/resilience_test.py
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from search_resilience import CircuitBreaker, ResilientSearchClient, CLOSED, OPEN, HALF_OPEN
+
+
+class HangingSearchClient:
+    """응답이 delay초 걸리는 Azure Search 대체 클라이언트 (failing이면 예외)"""
+
+    def __init__(self, delay, failing=False):
+        self.delay = delay
+        self.failing = failing
+
+    def search(self, search_text="*", **kwargs):
+        time.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError("simulated outage")
+        return [{"id": "primary"}]
+
+
+class LocalStub:
+    def search(self, search_text="*", **kwargs):
+        return [{"id": "local"}]
+
+
+def wait_for_state(breaker, state, limit=3.0):
+    deadline = time.monotonic() + limit
+    while breaker.state != state and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return breaker.state
+
+
+def test_saturated_primary_falls_back():
+    client = ResilientSearchClient(
+        HangingSearchClient(delay=3.0), LocalStub(), CircuitBreaker(min_calls=5),
+        hedge_min=0.1, hedge_max=0.2, timeout=1.0, max_workers=8,
+    )
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        results = list(pool.map(lambda i: client.search(search_text=f"q{i}"), range(12)))
+    elapsed = time.monotonic() - started
+
+    assert all(r == [{"id": "local"}] for r in results), results
+    assert elapsed < client.timeout, f"데드라인 초과: {elapsed:.2f}s"
+    # 실행 중인 primary는 timeout 시점에 실패로 기록됨
+    assert wait_for_state(client.breaker, OPEN) == OPEN, client.breaker.snapshot()
+
+
+def test_breaker_recovers_through_half_open():
+    primary = HangingSearchClient(delay=0.01, failing=True)
+    client = ResilientSearchClient(
+        primary, LocalStub(), CircuitBreaker(min_calls=3, cooldown=0.2),
+        hedge_min=0.05, hedge_max=0.1, timeout=1.0,
+    )
+    for i in range(3):
+        assert client.search(search_text=f"q{i}") == [{"id": "local"}]
+    assert client.breaker.state == OPEN, client.breaker.snapshot()
+    assert not client.breaker.allow_request()
+
+    # 쿨다운 후 시험 호출은 hedge_max보다 느려도 timeout까지 기다려 primary 결과를 사용
+    time.sleep(0.25)
+    assert client.breaker.state == HALF_OPEN
+    primary.failing, primary.delay = False, 0.3
+    assert client.search(search_text="probe") == [{"id": "primary"}]
+    assert client.breaker.state == CLOSED, client.breaker.snapshot()
+
+
+def test_hedge_deadline_follows_latency_shift():
+    primary = HangingSearchClient(delay=0.05)
+    client = ResilientSearchClient(
+        primary, LocalStub(), CircuitBreaker(slow_call_threshold=3.0),
+        hedge_min=0.05, hedge_max=2.0, timeout=1.0,
+    )
+    for i in range(20):
+        client.search(search_text=f"warm{i}")
+
+    # 느린 호출 기준(3초)보다 빠른 지연 증가 → 헤지는 잠시 일어나도 p95가 따라 올라가 primary로 복귀
+    primary.delay = 0.25
+    served = [client.search(search_text=f"q{i}")[0]["id"] for i in range(40)]
+    assert client.breaker.state == CLOSED, client.breaker.snapshot()
+    assert client.breaker.latency_percentile(0.95) >= 0.25, client.breaker.snapshot()
+    assert served[-10:].count("primary") >= 8, served
+
+
+TESTS = [
+    ("작업자 풀 포화 시 로컬 스냅샷 응답 및 브레이커 OPEN", test_saturated_primary_falls_back),
+    ("브레이커 CLOSED → OPEN → HALF_OPEN → CLOSED 복구", test_breaker_recovers_through_half_open),
+    ("지연 증가 후 p95 추종 및 primary 복귀", test_hedge_deadline_follows_latency_shift),
+]
+
+
+if __name__ == "__main__":
+    failed = 0
+    for label, test in TESTS:
+        started = time.monotonic()
+        try:
+            test()
+            print(f"✅ {label} ({time.monotonic() - started:.2f}s)")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {label}: {e}")
+    sys.exit(1 if failed else 0)
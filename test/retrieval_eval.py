@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+검색 품질 vs 지연 시간 오프라인 평가
+
+data/error_data.json에서 만든 라벨 질의(질의 → 기대 error_code)로 검색 백엔드별, k별
+recall@k, MRR@k, nDCG@k와 질의당 지연 시간(p50/p95), 전송 바이트(응답 JSON 크기)를 측정하고
+비교 표와 파레토 차트(SVG, 지연 시간 vs nDCG)를 출력합니다. Azure 없이 로컬 대체 클라이언트로만 실행합니다.
+
+백엔드:
+    local       원본 레코드 전체 로컬 인덱스, top=k 그대로 사용
+    dedup       준중복 대표 문서 인덱스 + search_errors()와 같은 다양화 (k × SEARCH_OVERFETCH개 조회)
+    sharded     dedup + 카테고리 샤드 라우팅
+    resilient   dedup + 지연/장애를 흉내 낸 원격 대체 클라이언트에 서킷 브레이커/헤지 요청 적용
+
+사용법:
+    python test/retrieval_eval.py
+    python test/retrieval_eval.py --queries 1000 --k 1,3,5,10 --backends local,dedup
+    python test/retrieval_eval.py --corpus ./data/synthetic_errors.jsonl --queries-file ./data/synthetic_queries.jsonl
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from corpus_snapshot import compile_snapshot, load_records
+from local_index import LocalSearchClient, read_snapshot
+from shard_routing import ShardedSearchClient, split_by_category, load_error_code_categories
+from search_resilience import CircuitBreaker, ResilientSearchClient
+from generate_data import generate_queries
+from dedup import dedup_records, diversify
+
+DEFAULT_CORPUS = os.path.join(ROOT, "data", "error_data.json")
+DEFAULT_OUT_DIR = os.path.join(ROOT, "eval_results")
+BACKENDS = ["local", "dedup", "sharded", "resilient"]
+
+
+class MeteredClient:
+    """응답 JSON 크기를 질의별 측정기에 누적하는 검색 클라이언트 래퍼 (원격 대체 시 지연/장애 주입)
+
+    측정기는 search(..., meter=) 인자로 호출마다 전달됩니다. 헤지 요청으로 버려진 원격 호출이
+    늦게 끝나도 그 호출을 시작한 질의의 측정기에 기록되므로 다음 질의 값에 섞이지 않습니다.
+    """
+
+    def __init__(self, client, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.client = client
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()   # 버려진 원격 호출과 다음 질의가 동시에 난수를 뽑을 수 있음
+
+    def search(self, search_text="*", meter=None, **kwargs):
+        if meter is not None:
+            meter.begin()
+        try:
+            with self._rng_lock:
+                delay = self.latency + (self._rng.expovariate(1 / self.jitter) if self.jitter else 0.0)
+                failed = bool(self.failure_rate) and self._rng.random() < self.failure_rate
+            if delay:
+                time.sleep(delay)
+            if failed:
+                raise ConnectionError("simulated remote failure")
+            results = list(self.client.search(search_text=search_text, **kwargs))
+            if meter is not None:
+                meter.add(len(json.dumps(results, ensure_ascii=False).encode("utf-8")))
+            return results
+        finally:
+            if meter is not None:
+                meter.end()
+
+
+class ByteMeter:
+    """질의 하나의 전송 바이트 (진행 중인 호출이 끝날 때까지 기다린 뒤 합계 조회)"""
+
+    def __init__(self):
+        self.total = 0
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def begin(self):
+        with self._idle:
+            self._pending += 1
+
+    def add(self, n):
+        with self._idle:
+            self.total += n
+
+    def end(self):
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def settled(self, timeout=30.0):
+        """버려진 호출까지 끝난 뒤의 합계"""
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0, timeout)
+            return self.total
+
+
+def load_documents(corpus_path):
+    """운영과 같은 경로(스냅샷 컴파일 → 인덱스 문서)로 코퍼스 로드"""
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "eval.snap")
+        compile_snapshot(load_records(corpus_path), snapshot_path)
+        return read_snapshot(snapshot_path), load_error_code_categories(snapshot_path)
+
+
+def build_backends(names, documents, error_code_categories, args):
+    """백엔드 이름 → 검색 함수(query, k, meter)"""
+    canonical = dedup_records(documents)
+    backends = {}
+
+    def diversified(client):
+        return lambda query, k, meter: diversify(list(client.search(search_text=query, top=k * args.overfetch, meter=meter)), k)
+
+    for name in names:
+        if name == "local":
+            client = MeteredClient(LocalSearchClient(documents))
+            backends[name] = lambda query, k, meter, client=client: list(client.search(search_text=query, top=k, meter=meter))
+        elif name == "dedup":
+            backends[name] = diversified(MeteredClient(LocalSearchClient(canonical)))
+        elif name == "sharded":
+            segments = {
+                category: MeteredClient(LocalSearchClient(shard_documents))
+                for category, shard_documents in split_by_category(canonical).items()
+            }
+            backends[name] = diversified(ShardedSearchClient(segments, error_code_categories))
+        elif name == "resilient":
+            index = LocalSearchClient(canonical)
+            remote = MeteredClient(index, latency=args.remote_latency_ms / 1000,
+                                   jitter=args.remote_jitter_ms / 1000,
+                                   failure_rate=args.remote_failure_rate, seed=args.seed)
+            client = ResilientSearchClient(remote, MeteredClient(index), CircuitBreaker(),
+                                           hedge_min=args.hedge_min_ms / 1000)
+            backends[name] = diversified(client)
+        else:
+            raise ValueError(f"알 수 없는 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+    return backends
+
+
+def first_hit_rank(results, expected_error_code):
+    for rank, result in enumerate(results, 1):
+        if result.get("error_code") == expected_error_code:
+            return rank
+    return None
+
+
+def evaluate(search, queries, k):
+    """질의 목록에 대한 recall/MRR/nDCG@k, 지연 시간, 전송 바이트 (버려진 헤지 원격 호출 포함)"""
+    hits, reciprocal, gains, latencies, meters = 0, 0.0, 0.0, [], []
+    for item in queries:
+        meter = ByteMeter()
+        started = time.perf_counter()
+        results = search(item["query"], k, meter)
+        latencies.append((time.perf_counter() - started) * 1000)
+        meters.append(meter)
+
+        # 질의당 정답 에러 코드는 하나 → 첫 번째 정답 위치만 반영 (IDCG = 1)
+        rank = first_hit_rank(results[:k], item["expected_error_code"])
+        if rank:
+            hits += 1
+            reciprocal += 1 / rank
+            gains += 1 / math.log2(rank + 1)
+
+    n = len(queries)
+    sizes = [meter.settled() for meter in meters]
+    latencies.sort()
+    return {
+        "recall": hits / n,
+        "mrr": reciprocal / n,
+        "ndcg": gains / n,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(n - 1, int(n * 0.95))],
+        "bytes": sum(sizes) / n,
+    }
+
+
+def pareto_front(rows):
+    """지연 시간(p50)은 낮고 nDCG는 높은 쪽이 우세 - 다른 행에 지배되지 않는 행 표시"""
+    for row in rows:
+        row["pareto"] = not any(
+            other is not row
+            and other["p50_ms"] <= row["p50_ms"] and other["ndcg"] >= row["ndcg"]
+            and (other["p50_ms"] < row["p50_ms"] or other["ndcg"] > row["ndcg"])
+            for other in rows
+        )
+    return rows
+
+
+def write_svg(rows, path, width=720, height=440, margin=60):
+    """지연 시간(p50, 로그 축) vs nDCG 산점도와 파레토 경계선"""
+    xs = [math.log10(max(row["p50_ms"], 0.01)) for row in rows]
+    x_min, x_max = min(xs), max(xs)
+    x_span = (x_max - x_min) or 1.0
+    y_min = min(row["ndcg"] for row in rows)
+    y_min = max(0.0, y_min - 0.05)
+    y_span = (1.0 - y_min) or 1.0
+
+    def point(row):
+        x = margin + (math.log10(max(row["p50_ms"], 0.01)) - x_min) / x_span * (width - 2 * margin)
+        y = height - margin - (row["ndcg"] - y_min) / y_span * (height - 2 * margin)
+        return x, y
+
+    colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b"]
+    backend_color = {}
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+        f'<line x1="{margin}" y1="{height - margin}" x2="{width - margin}" y2="{height - margin}" stroke="black"/>',
+        f'<line x1="{margin}" y1="{margin}" x2="{margin}" y2="{height - margin}" stroke="black"/>',
+        f'<text x="{width / 2}" y="{height - 20}" text-anchor="middle">p50 latency (ms, log scale): {10 ** x_min:.2f} ~ {10 ** x_max:.2f}</text>',
+        f'<text x="15" y="{height / 2}" transform="rotate(-90 15 {height / 2})" text-anchor="middle">nDCG@k ({y_min:.2f} ~ 1.00)</text>',
+    ]
+    front = sorted((row for row in rows if row["pareto"]), key=lambda row: row["p50_ms"])
+    if len(front) > 1:
+        points = " ".join(f"{x:.1f},{y:.1f}" for x, y in map(point, front))
+        parts.append(f'<polyline points="{points}" fill="none" stroke="gray" stroke-dasharray="4 3"/>')
+    for row in rows:
+        color = backend_color.setdefault(row["backend"], colors[len(backend_color) % len(colors)])
+        x, y = point(row)
+        radius = 6 if row["pareto"] else 4
+        parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{radius}" fill="{color}"/>')
+        parts.append(f'<text x="{x + 8:.1f}" y="{y - 6:.1f}">{row["backend"]}@{row["k"]}</text>')
+    parts.append("</svg>")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="검색 품질 vs 지연 시간 오프라인 평가")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="평가 코퍼스 (.json / .jsonl)")
+    parser.add_argument("--queries-file", help="라벨 질의 JSONL (미지정 시 --corpus 기준으로 생성)")
+    parser.add_argument("--queries", type=int, default=300, help="생성할 질의 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--k", default="1,3,5,10", help="쉼표로 구분한 k 목록")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--overfetch", type=int, default=int(os.getenv("SEARCH_OVERFETCH", "3")))
+    parser.add_argument("--remote-latency-ms", type=float, default=20.0, help="원격(Azure) 대체 클라이언트 기본 지연")
+    parser.add_argument("--remote-jitter-ms", type=float, default=10.0, help="원격 대체 클라이언트 지연 편차 (지수 분포 평균)")
+    parser.add_argument("--remote-failure-rate", type=float, default=0.02)
+    parser.add_argument("--hedge-min-ms", type=float, default=30.0)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="결과 JSON / 파레토 차트 SVG 저장 경로")
+    args = parser.parse_args(argv)
+
+    ks = [int(k) for k in args.k.split(",")]
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+
+    documents, error_code_categories = load_documents(args.corpus)
+    if args.queries_file:
+        queries = load_records(args.queries_file)[:args.queries]
+    else:
+        queries = list(generate_queries(load_records(args.corpus), args.queries, seed=args.seed))
+    print(f"📚 코퍼스 {len(documents):,}건, 라벨 질의 {len(queries):,}건, k={ks}")
+
+    rows = []
+    for name, search in build_backends(names, documents, error_code_categories, args).items():
+        for k in ks:
+            rows.append({"backend": name, "k": k, **evaluate(search, queries, k)})
+    pareto_front(rows)
+
+    print(f"{'backend':<10} {'k':>3} {'recall':>7} {'MRR':>7} {'nDCG':>7} {'p50':>9} {'p95':>9} {'bytes/q':>9}  pareto")
+    print("-" * 80)
+    for row in rows:
+        print(f"{row['backend']:<10} {row['k']:>3} {row['recall']:>7.3f} {row['mrr']:>7.3f} {row['ndcg']:>7.3f} "
+              f"{row['p50_ms']:>7.2f}ms {row['p95_ms']:>7.2f}ms {row['bytes']:>9,.0f}  {'★' if row['pareto'] else ''}")
+
+    os.makedirs(args.out, exist_ok=True)
+    json_path = os.path.join(args.out, "retrieval_eval.json")
+    svg_path = os.path.join(args.out, "retrieval_pareto.svg")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"corpus": args.corpus, "queries": len(queries), "rows": rows}, f, ensure_ascii=False, indent=2)
+    write_svg(rows, svg_path)
+    print(f"💾 결과 저장: {json_path}, {svg_path}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
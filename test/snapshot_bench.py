@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+바이너리 스냅샷 vs json.load 로드 성능 비교
+
+generate_data.py의 합성 코퍼스(설명/상태/지표가 레코드마다 다름)로 N건을 만든 뒤
+로드 시간과 Python 힙 사용량(tracemalloc 최대치)을 비교합니다.
+--duplicate는 원본 30건을 그대로 복제하는데, 복제된 텍스트는 스냅샷 문자열 테이블에서
+중복 제거되므로 스냅샷이 실제보다 훨씬 작고 빠르게 나옵니다 (참고용).
+mmap으로 매핑된 페이지는 OS 페이지 캐시에 속하므로 힙 사용량에 포함되지 않습니다.
+
+"전체 디코딩 (list)"은 update_data.load_snapshot과 같은 경로로, 전체 레코드가 필요하면
+스냅샷도 json.load와 비슷한 비용이 듭니다. 이득은 열기/부분 조회에만 있습니다.
+
+사용법:
+    python test/snapshot_bench.py [레코드 수, 기본 1000000] [--duplicate]
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus_snapshot import CorpusSnapshot, compile_snapshot
+from generate_data import CorpusGenerator
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "error_data.json")
+
+
+def build_corpus(n_records, duplicate=False):
+    """합성 레코드 N건 생성 (duplicate면 원본 레코드를 복제하여 id/occurred_at만 다르게)"""
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    if not duplicate:
+        return list(CorpusGenerator(base, seed=42).records(n_records))
+    corpus = []
+    for i in range(n_records):
+        record = dict(base[i % len(base)])
+        record["id"] = str(i + 1)
+        record["occurred_at"] = f"2025-09-{1 + i % 30:02d}T{i % 24:02d}:{i % 60:02d}:{(i // 60) % 60:02d}Z"
+        corpus.append(record)
+    return corpus
+
+
+def measure(label, func):
+    """시간은 추적 없이, 힙 사용량은 tracemalloc으로 한 번 더 실행하여 측정"""
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {elapsed:>9.3f}s {peak / 1024 / 1024:>10.1f} MB")
+    return result
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    duplicate = "--duplicate" in sys.argv[1:]
+    n_records = int(args[0]) if args else 1_000_000
+    print(f"🧪 코퍼스 생성 중... ({n_records:,}건, {'원본 복제' if duplicate else '합성'})")
+    corpus = build_corpus(n_records, duplicate)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "corpus.json")
+        snap_path = os.path.join(tmp, "corpus.snap")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(corpus, f, ensure_ascii=False)
+        compile_snapshot(corpus, snap_path)
+        del corpus
+
+        print(f"JSON 크기: {os.path.getsize(json_path):,} bytes / 스냅샷 크기: {os.path.getsize(snap_path):,} bytes")
+        print(f"{'측정 항목':<32} {'시간':>10} {'최대 힙':>13}")
+        print("-" * 58)
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                return len(json.load(f))
+
+        def open_snapshot():
+            with CorpusSnapshot(snap_path) as snapshot:
+                return len(snapshot)
+
+        def lookup_snapshot():
+            with CorpusSnapshot(snap_path) as snapshot:
+                return [snapshot.record(i)["error_code"] for i in snapshot.lookup("error_code", "MSA-001")[:100]]
+
+        def stream_snapshot():
+            with CorpusSnapshot(snap_path) as snapshot:
+                return sum(1 for _ in snapshot.records())
+
+        def decode_snapshot():
+            with CorpusSnapshot(snap_path) as snapshot:
+                return len(list(snapshot.records()))
+
+        measure("json.load (전체 파싱)", load_json)
+        measure("스냅샷 열기 (mmap)", open_snapshot)
+        measure("스냅샷 열기 + 조회 100건", lookup_snapshot)
+        measure("스냅샷 순회 (레코드 1건씩)", stream_snapshot)
+        measure("스냅샷 전체 디코딩 (list)", decode_snapshot)
+
+
+if __name__ == "__main__":
+    main()
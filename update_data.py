@@ -1,5 +1,7 @@
 import os
+import sys
 import json
+import time
 from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
@@ -9,6 +11,11 @@ from azure.search.documents.indexes.models import (
     SearchableField
 )
 from azure.core.credentials import AzureKeyCredential
+from concurrent.futures import ThreadPoolExecutor
+from corpus_snapshot import CorpusSnapshot, SnapshotError, DEFAULT_SNAPSHOT_PATH, compile_snapshot, validate_records, load_records, source_fingerprint, split_values
+from shard_routing import CATEGORY_SHARDS, sharding_enabled, shard_index_name, resolve_category, split_by_category
+from dedup import dedup_enabled, dedup_records
+from system_graph import DEFAULT_GRAPH_PATH, build_graph
 
 # .env 파일 지원
 try:
@@ -24,6 +31,22 @@ SEARCH_API_KEY = os.getenv("AZURE_SEARCH_ADMIN_KEY")
 INDEX_NAME = os.getenv("AZURE_SEARCH_INDEX_NAME")
 API_VERSION = "2023-11-01"
 
+# 원본 데이터 파일 (AIRA_DATA_FILE로 합성 데이터 JSONL 지정 가능)
+DATA_FILE = os.getenv("AIRA_DATA_FILE") or "./data/error_data.json"
+
+# 바이너리 스냅샷 경로 (Azure Search 장애 시 app.py에서 로컬 인덱스로 사용)
+SNAPSHOT_PATH = os.getenv("AZURE_SEARCH_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+
+# 연관 시스템 그래프 경로 (app.py 사이드바 영향 범위 조회, 응답 프롬프트에 사용)
+GRAPH_PATH = os.getenv("AIRA_SYSTEM_GRAPH_PATH", DEFAULT_GRAPH_PATH)
+
+# 다른 원본(합성 데이터 등)으로 실행할 때는 운영용 스냅샷/그래프/인덱스를 덮어쓰지 않도록 따로 저장
+# (create_search_index()가 기존 인덱스를 삭제하므로 인덱스 이름도 반드시 분리)
+if os.getenv("AIRA_DATA_FILE"):
+    SNAPSHOT_PATH = f"{os.path.splitext(DATA_FILE)[0]}.snap"
+    GRAPH_PATH = f"{os.path.splitext(DATA_FILE)[0]}.graph.bin"
+    INDEX_NAME = os.getenv("AIRA_DATA_INDEX_NAME") or (f"{INDEX_NAME}-synthetic" if INDEX_NAME else None)
+
 # Azure Search 엔드포인트
 search_endpoint = f"{SEARCH_SERVICE_NAME}" if SEARCH_SERVICE_NAME else None
 
@@ -40,9 +63,10 @@ def check_environment():
     print(f"✅ API 키: {'*' * (len(SEARCH_API_KEY) - 4) + SEARCH_API_KEY[-4:] if len(SEARCH_API_KEY) > 4 else '****'}")
     return True
 
-def create_search_index():
+def create_search_index(index_name=None):
     """Azure Search 인덱스 생성 - 기본 필드만 사용"""
-    print("=== Azure Search 설정 시작 ===")
+    index_name = index_name or INDEX_NAME
+    print(f"=== Azure Search 설정 시작 ({index_name}) ===")
     
     credential = AzureKeyCredential(SEARCH_API_KEY)
     index_client = SearchIndexClient(
@@ -54,10 +78,10 @@ def create_search_index():
     try:
         # 기존 인덱스 삭제
         try:
-            index_client.delete_index(INDEX_NAME)
-            print(f"🗑️ 기존 인덱스 '{INDEX_NAME}' 삭제됨")
+            index_client.delete_index(index_name)
+            print(f"🗑️ 기존 인덱스 '{index_name}' 삭제됨")
         except Exception:
-            print(f"ℹ️ 기존 인덱스 '{INDEX_NAME}'가 없거나 삭제 실패")
+            print(f"ℹ️ 기존 인덱스 '{index_name}'가 없거나 삭제 실패")
         
         # 기본 필드만 사용한 인덱스 정의
         fields = [
@@ -75,12 +99,16 @@ def create_search_index():
             # occurred_at 필드 추가 (날짜/시간으로 저장)
             SimpleField(name="occurred_at", type=SearchFieldDataType.DateTimeOffset, filterable=True, sortable=True),
             SearchableField(name="system_status", type=SearchFieldDataType.String),
+            # 준중복 클러스터 대표 문서의 발생 횟수/기간
+            SimpleField(name="occurrence_count", type=SearchFieldDataType.Int32, filterable=True, sortable=True),
+            SimpleField(name="first_occurred_at", type=SearchFieldDataType.DateTimeOffset, filterable=True, sortable=True),
+            SimpleField(name="last_occurred_at", type=SearchFieldDataType.DateTimeOffset, filterable=True, sortable=True),
         ]
         
         # 인덱스 생성
-        index = SearchIndex(name=INDEX_NAME, fields=fields)
+        index = SearchIndex(name=index_name, fields=fields)
         result = index_client.create_index(index)
-        print(f"✅ 인덱스 '{INDEX_NAME}' 생성 완료")
+        print(f"✅ 인덱스 '{index_name}' 생성 완료")
         print(f"   필드 수: {len(fields)}개")
         
         return True
@@ -89,23 +117,53 @@ def create_search_index():
         print(f"❌ 인덱스 생성 실패: {e}")
         return False
 
+def load_snapshot(filename):
+    """컴파일된 바이너리 스냅샷에서 레코드 로드 (같은 원본 파일에서 만든 스냅샷일 때만 사용)
+
+    업로드/준중복 병합에 전체 레코드가 필요하므로 모두 디코딩합니다 (json.load와 비슷한 비용).
+    이득은 스키마 검증과 스냅샷/그래프 재생성을 건너뛰는 것입니다.
+    """
+    if not os.path.exists(SNAPSHOT_PATH) or not os.path.exists(GRAPH_PATH) or not os.path.exists(filename):
+        return None
+    try:
+        with CorpusSnapshot(SNAPSHOT_PATH) as snapshot:
+            if snapshot.source != source_fingerprint(filename):
+                return None
+            data = list(snapshot.records())
+        print(f"📦 스냅샷 '{SNAPSHOT_PATH}' 로드 완료 ({len(data)}건)")
+        return data
+    except (OSError, SnapshotError) as e:
+        print(f"⚠️ 스냅샷 로드 실패, 원본 JSON 사용: {e}")
+        return None
+
 def load_data():
-    """JSON 데이터 파일 로드"""
-    data_files = ['./data/error_data.json']
+    """JSON 데이터 파일 로드 및 스키마 검증 (AIRA_DATA_FILE로 합성 데이터 JSONL 지정 가능)
+
+    (레코드 목록, 스냅샷에서 읽었는지 여부) 반환 - 로드 실패 시 (None, False)
+    """
+    data_files = [DATA_FILE]
     
     for filename in data_files:
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_snapshot(filename)
+            if data is not None:
+                return data, True
+            data = load_records(filename)
             print(f"📄 데이터 파일 '{filename}' 로드 완료 ({len(data)}건)")
-            return data
         except FileNotFoundError:
             continue
         except json.JSONDecodeError as e:
             print(f"❌ '{filename}' 파일 읽기 오류: {e}")
             continue
+        
+        valid_data, invalid = validate_records(data)
+        for i, errors in invalid:
+            print(f"⚠️ 스키마 오류 (항목 {i}): {'; '.join(errors)}")
+        if invalid:
+            print(f"   스키마 검증 실패 {len(invalid)}건 제외")
+        return valid_data, False
     
-    return None
+    return None, False
 
 def preprocess_data(data):
     """데이터 전처리 - 문제가 되는 필드 제거 및 정리"""
@@ -134,13 +192,52 @@ def preprocess_data(data):
         print(f"   제거된 필드: {', '.join(fields_to_remove)}")
     return processed_data
 
-def upload_data(data):
+def export_snapshot(data):
+    """검증된 레코드를 바이너리 스냅샷으로 컴파일 (전처리 전 원본 형태로 저장)"""
+    try:
+        count = compile_snapshot(data, SNAPSHOT_PATH, source=source_fingerprint(DATA_FILE))
+        print(f"💾 스냅샷 컴파일 완료: {SNAPSHOT_PATH} ({count}건, {os.path.getsize(SNAPSHOT_PATH):,} bytes)")
+        return True
+    except Exception as e:
+        print(f"⚠️ 스냅샷 컴파일 실패: {e}")
+        return False
+
+def export_graph(data):
+    """related_systems / system_status로 연관 시스템 그래프 생성 (준중복 병합 전 전체 레코드 기준)"""
+    try:
+        graph = build_graph(data)
+        graph.save(GRAPH_PATH)
+        print(f"🕸️ 시스템 그래프 생성 완료: {GRAPH_PATH} (시스템 {len(graph)}개, 간선 {len(graph.edge_targets)}개)")
+        return True
+    except Exception as e:
+        print(f"⚠️ 시스템 그래프 생성 실패: {e}")
+        return False
+
+def export_artifacts(data, from_snapshot):
+    """스냅샷 / 시스템 그래프 생성 - 원본이 바뀌지 않아 스냅샷에서 읽은 경우에는 생략 (실패해도 업로드는 계속 진행)"""
+    if from_snapshot:
+        print(f"⏭️ 원본이 바뀌지 않아 스냅샷/그래프 재생성 생략 ({SNAPSHOT_PATH}, {GRAPH_PATH})")
+        return
+    export_snapshot(data)
+    export_graph(data)
+
+def dedup_data(data):
+    """준중복 레코드를 대표 문서로 묶음 (INGEST_DEDUP=false면 그대로 반환)"""
+    if not dedup_enabled():
+        return data
+    started = time.perf_counter()
+    documents = dedup_records(data)
+    merged = len(data) - len(documents)
+    print(f"🧬 준중복 클러스터링 완료: {len(data)}건 → {len(documents)}건 ({merged}건 병합, {time.perf_counter() - started:.1f}초)")
+    return documents
+
+def upload_data(data, index_name=None):
     """Azure Search에 데이터 업로드"""
     try:
         credential = AzureKeyCredential(SEARCH_API_KEY)
         search_client = SearchClient(
             endpoint=search_endpoint, 
-            index_name=INDEX_NAME, 
+            index_name=index_name or INDEX_NAME, 
             credential=credential,
             api_version=API_VERSION
         )
@@ -194,13 +291,13 @@ def upload_data(data):
         print(f"❌ 데이터 업로드 오류: {e}")
         return False
 
-def verify_upload():
+def verify_upload(index_name=None):
     """업로드된 데이터 검증"""
     try:
         credential = AzureKeyCredential(SEARCH_API_KEY)
         search_client = SearchClient(
             endpoint=search_endpoint, 
-            index_name=INDEX_NAME, 
+            index_name=index_name or INDEX_NAME, 
             credential=credential,
             api_version=API_VERSION
         )
@@ -228,29 +325,90 @@ def verify_upload():
         print(f"❌ 검증 실패: {e}")
         return False
 
-def main():
-    """메인 실행 함수"""
-    print("🚀 Azure Search 데이터 업데이트 시작 (기본 스키마)")
+def select_shard_records(data, categories):
+    """지정한 샤드 재빌드에 필요한 레코드만 선택
+
+    준중복 병합은 같은 error_code 안에서만 묶이므로, 지정 카테고리에 나오는 에러 코드의 레코드를
+    모두 포함하면 전체 빌드와 같은 대표 문서가 만들어집니다.
+    """
+    codes = {
+        record.get("error_code") for record in data
+        if any(category in categories for category in split_values(record.get("category", "")))
+    }
+    return [record for record in data if record.get("error_code") in codes]
+
+def build_shard(category, records):
+    """카테고리 샤드 인덱스 하나를 생성/업로드/검증 (다른 샤드와 독립적으로 재빌드 가능)"""
+    index_name = shard_index_name(INDEX_NAME, category)
+    if not create_search_index(index_name):
+        return False
+    if not upload_data(records, index_name):
+        return False
+    if not verify_upload(index_name):
+        print(f"⚠️ [{category}] 검증에 실패했지만 일부 데이터는 업로드되었을 수 있습니다.")
+    return True
+
+def build_shards(data, categories):
+    """카테고리별 샤드 인덱스를 병렬로 빌드"""
+    # 여러 샤드에 들어가는 레코드가 있으므로 전처리는 한 번만 하고 샤드별로 복사해서 사용
+    shards = split_by_category(preprocess_data(data))
+    print(f"🧩 샤드 빌드 시작: {', '.join(f'{c}({len(shards[c])}건)' for c in categories)}")
+    
+    with ThreadPoolExecutor(max_workers=len(categories)) as executor:
+        futures = {
+            category: executor.submit(build_shard, category, [dict(r) for r in shards[category]])
+            for category in categories
+        }
+        results = {category: future.result() for category, future in futures.items()}
+    
+    for category, ok in results.items():
+        index_name = shard_index_name(INDEX_NAME, category)
+        print(f"   {'✅' if ok else '❌'} {category} → {index_name}")
+    return all(results.values())
+
+def main(shards=None):
+    """메인 실행 함수 (shards 지정 시 해당 카테고리 샤드만 재빌드)"""
+    sharded = sharding_enabled() or bool(shards)
+    print(f"🚀 Azure Search 데이터 업데이트 시작 ({'카테고리 샤드' if sharded else '기본 스키마'})")
     print("=" * 60)
     
-    # 환경 변수 확인
+    # 1. 데이터 로드 및 바이너리 스냅샷 / 시스템 그래프 생성
+    #    Azure 호출(인덱스 삭제/생성) 전에, 환경 변수와 무관하게 먼저 만들어 두어야
+    #    Azure Search 장애 중에 실행해도 app.py가 로컬 스냅샷으로 응답할 수 있음
+    data, from_snapshot = load_data()
+    if not data:
+        return False
+    if shards:
+        # 일부 샤드만 재빌드할 때는 스냅샷/그래프를 건드리지 않고 해당 샤드 레코드만 처리
+        data = select_shard_records(data, shards)
+        print(f"🎯 지정 샤드 재빌드: {', '.join(shards)} (레코드 {len(data)}건, 스냅샷/그래프 재생성 생략)")
+    else:
+        export_artifacts(data, from_snapshot)
+    
+    # 2. 환경 변수 확인
     if not check_environment():
         return False
     
-    # 1. 인덱스 생성
+    if sharded:
+        data = dedup_data(data)
+        if not build_shards(data, shards or list(CATEGORY_SHARDS)):
+            return False
+        print("=" * 60)
+        print("🎉 Azure Search 샤드 업데이트 완료!")
+        return True
+    
+    # 3. 인덱스 생성
     if not create_search_index():
         return False
     
-    # 2. 데이터 로드
-    data = load_data()
-    if not data:
-        return False
+    # 4. 준중복 클러스터링 (스냅샷은 원본 전체를 유지)
+    data = dedup_data(data)
     
-    # 3. 데이터 업로드
+    # 5. 데이터 업로드
     if not upload_data(data):
         return False
     
-    # 4. 업로드 검증
+    # 6. 업로드 검증
     if not verify_upload():
         print("⚠️ 검증에 실패했지만 일부 데이터는 업로드되었을 수 있습니다.")
     
@@ -260,7 +418,10 @@ def main():
 
 if __name__ == "__main__":
     try:
-        success = main()
+        # python update_data.py --shard 번호이동 --shard device  → 지정한 샤드만 재빌드
+        args = sys.argv[1:]
+        shards = [resolve_category(args[i + 1]) for i, arg in enumerate(args) if arg == "--shard" and i + 1 < len(args)]
+        success = main(shards)
         if success:
             print("\n✅ 모든 작업이 성공적으로 완료되었습니다.")
         else: